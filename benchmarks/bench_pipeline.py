@@ -0,0 +1,235 @@
+"""Benchmark per stage pipeline klasterisasi obat pada data sintetis.
+
+Waktu setiap stage diambil dari beberapa pengulangan seluruh urutan stage
+(minimum sebagai angka utama, median sebagai pembanding), lalu satu run lagi
+dengan tracemalloc untuk puncak alokasi memori. RSS proses setelah setiap stage
+dan puncak RSS (ru_maxrss) juga dicatat. Hasil ditulis sebagai JSON sehingga
+dua run bisa dibandingkan.
+
+    python benchmarks/bench_pipeline.py --rows 10000 100000 --items 1000 --output bench.json
+    python benchmarks/bench_pipeline.py --rows 1000000 --items 10000 --compare bench.json
+    python benchmarks/bench_pipeline.py --rows 1000000 --lean --output bench_lean.json
+    python benchmarks/bench_pipeline.py --rows 1000000 --items 100000 --backend minibatch
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import forecast  # noqa: E402
+import pipeline_obat as pipeline  # noqa: E402
+from synthetic import generate_invoices, generate_rainfall  # noqa: E402
+
+
+def _rss_mb():
+    """RSS proses saat ini (Linux: /proc/self/statm), selain itu puncak RSS."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        return _peak_rss_mb()
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+
+def _stages(data_obat, data_hujan, n_clusters, seed, lean=False, cluster_config=None):
+    """Urutan stage dashboard. Setiap stage menerima keluaran stage sebelumnya."""
+    state = {}
+
+    def clean():
+        state['clean'] = pipeline.clean_data(data_obat, lean=lean)
+        return state['clean']
+
+    def stability():
+        state['data'] = pipeline.compute_stability(state['clean'])
+        return state['data']
+
+    def aggregate():
+        state['grouped'] = pipeline.aggregate_items(state['data'])
+        return state['grouped']
+
+    def fit():
+        state['grouped'], _ = pipeline.fit_clusters(
+            state['grouped'], n_clusters=n_clusters, random_state=seed, cluster_config=cluster_config
+        )
+        return state['grouped']
+
+    def views():
+        state['views'] = pipeline.build_cluster_views(state['data'], state['grouped'], data_hujan)
+        return state['views']
+
+    def use_index():
+        index = pipeline.build_use_index(state['grouped'])
+        return pipeline.use_totals(index, state['grouped']['Cluster'], state['grouped']['Qty'])
+
+    def forecast_orders():
+        return forecast.forecast_orders(state['views'], state['grouped'], pipeline.monthly_rainfall(data_hujan))
+
+    def top_cube():
+        cube, groups = pipeline.build_top_cube(state['views'])
+        top, _ = pipeline.slice_top_cube(cube, groups, groups['Cluster'].unique(), groups['Periode'].unique(), 10)
+        return top
+
+    return [
+        ('racikan_filter', clean),
+        ('cv_stability', stability),
+        ('data_grouped', aggregate),
+        ('scaler_kmeans', fit),
+        ('data_final_merge', views),
+        ('use_index', use_index),
+        ('optimalisasi_rank', top_cube),
+        ('forecast', forecast_orders),
+    ]
+
+
+def _run_stages(data_obat, data_hujan, n_clusters, seed, trace, lean=False, cluster_config=None):
+    results = []
+    for name, func in _stages(data_obat, data_hujan, n_clusters, seed, lean, cluster_config):
+        if trace:
+            tracemalloc.start()
+        start = time.perf_counter()
+        out = func()
+        seconds = time.perf_counter() - start
+        entry = {'stage': name, 'seconds': seconds, 'rows_out': len(out)}
+        if not trace:
+            entry['rss_mb'] = _rss_mb()
+            entry['peak_rss_mb'] = _peak_rss_mb()
+        if trace:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            entry['peak_mb'] = peak / 2**20
+        results.append(entry)
+    return results
+
+
+def bench(n_rows, n_items, n_months=12, n_clusters=3, seed=42, memory=True, lean=False, cluster_config=None,
+          repeat=5):
+    start = time.perf_counter()
+    data_obat = generate_invoices(n_rows, n_items, n_months=n_months, seed=seed)
+    data_hujan = generate_rainfall(n_months=n_months, seed=seed)
+    generate_seconds = time.perf_counter() - start
+
+    # Stage saling bergantung, jadi seluruh urutan diulang; per stage diambil minimum + median
+    passes = [_run_stages(data_obat, data_hujan, n_clusters, seed, False, lean, cluster_config)
+              for _ in range(max(repeat, 1))]
+    stages = passes[-1]
+    for i, entry in enumerate(stages):
+        times = [p[i]['seconds'] for p in passes]
+        entry['seconds'] = min(times)
+        entry['median_seconds'] = float(np.median(times))
+        entry['repeat'] = len(times)
+    if memory:
+        traced = _run_stages(data_obat, data_hujan, n_clusters, seed, True, lean, cluster_config)
+        for entry, mem in zip(stages, traced):
+            entry['peak_mb'] = mem['peak_mb']
+
+    return {
+        'rows': n_rows,
+        'items': n_items,
+        'months': n_months,
+        'lean': lean,
+        'cluster_config': cluster_config,
+        'input_mb': data_obat.memory_usage(deep=True).sum() / 2**20,
+        'generate_seconds': generate_seconds,
+        'total_seconds': sum(s['seconds'] for s in stages),
+        'stages': stages,
+    }
+
+
+def _run_key(run):
+    """Kunci pencocokan run: ukuran data dan konfigurasi (lean, backend) harus sama."""
+    config = run.get('cluster_config') or pipeline.CLUSTER_CONFIG
+    return (run['rows'], run['items'], run.get('months', 12), run.get('lean', False),
+            json.dumps(config, sort_keys=True))
+
+
+def compare(current, baseline, threshold, min_delta=0.01):
+    """Bandingkan dengan JSON sebelumnya. Mengembalikan daftar stage yang melambat.
+
+    Stage dianggap regresi bila rasio waktu melewati threshold dan selisihnya lebih
+    dari min_delta detik, sehingga stage berskala milidetik tidak memicu alarm palsu.
+    """
+    old = {_run_key(r) + (s['stage'],): s for r in baseline['runs'] for s in r['stages']}
+    regressions = []
+    for run in current['runs']:
+        for s in run['stages']:
+            before = old.get(_run_key(run) + (s['stage'],))
+            if before is None:
+                continue
+            ratio = s['seconds'] / max(before['seconds'], 1e-9)
+            s['baseline_ratio'] = ratio
+            if ratio > threshold and s['seconds'] - before['seconds'] > min_delta:
+                regressions.append((run['rows'], run['items'], s['stage'], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark stage pipeline pada data sintetis.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--items', type=int, nargs='+', default=[1_000])
+    parser.add_argument('--months', type=int, default=12)
+    parser.add_argument('--k', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--no-memory', action='store_true', help="Lewati pengukuran tracemalloc.")
+    parser.add_argument('--lean', action='store_true', help="Jalankan clean_data dalam mode hemat memori.")
+    parser.add_argument('--backend', choices=pipeline.CLUSTER_BACKENDS, help="Backend klasterisasi (default: env).")
+    parser.add_argument('--output', default='bench.json')
+    parser.add_argument('--compare', help="JSON hasil sebelumnya sebagai pembanding.")
+    parser.add_argument('--threshold', type=float, default=1.2, help="Rasio waktu yang dianggap regresi.")
+    parser.add_argument('--min-delta', type=float, default=0.01,
+                        help="Selisih waktu minimum (detik) agar dianggap regresi.")
+    parser.add_argument('--repeat', type=int, default=5, help="Jumlah pengulangan pengukuran waktu.")
+    args = parser.parse_args(argv)
+    cluster_config = pipeline.cluster_config_from_env()
+    if args.backend:
+        cluster_config['backend'] = args.backend
+
+    report = {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'sklearn': sklearn.__version__,
+            'cpu_count': os.cpu_count(),
+        },
+        'runs': [],
+    }
+    for n_items in args.items:
+        for n_rows in args.rows:
+            run = bench(n_rows, n_items, args.months, args.k, args.seed, memory=not args.no_memory,
+                        lean=args.lean, cluster_config=cluster_config, repeat=args.repeat)
+            report['runs'].append(run)
+            print(f"rows={n_rows:>10,} items={n_items:>7,} total={run['total_seconds']:.2f}s")
+            for s in run['stages']:
+                mem = f"{s['peak_mb']:9.1f} MB" if 'peak_mb' in s else ''
+                print(f"    {s['stage']:<20} {s['seconds']:8.3f}s (median {s['median_seconds']:.3f}s) "
+                      f"{mem} rss={s['rss_mb']:.0f} MB")
+
+    regressions = []
+    if args.compare:
+        regressions = compare(report, json.loads(Path(args.compare).read_text()), args.threshold, args.min_delta)
+        for rows, items, stage, ratio in regressions:
+            print(f"REGRESI rows={rows} items={items} {stage}: {ratio:.2f}x lebih lambat")
+
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
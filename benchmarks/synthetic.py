@@ -0,0 +1,88 @@
+"""Generator data sintetis dengan skema yang sama seperti sheet invoice dan BMKG.
+
+Kolom invoice: Item, Supplier, Use, Qty, Item Amount, Invoice Date.
+Kolom curah hujan: TANGGAL, RR.
+
+Semua kolom dibangkitkan secara vektor (tanpa loop per baris), sehingga 10 juta
+baris tetap bisa dibuat dalam hitungan detik. Item/Supplier/Use disimpan sebagai
+categorical agar memori tetap kecil.
+"""
+import numpy as np
+import pandas as pd
+
+USES = [
+    'Hipertensi', 'Diabetes mellitus tipe 2', 'Vitamin D', 'Vitamin kehamilan', 'Infeksi bakteri',
+    'Nyeri', 'Demam', 'Asma', 'Alergi', 'Kolesterol', 'Gastritis', 'Diare', 'Batuk', 'Flu',
+    'Anemia', 'Osteoporosis', 'Gangguan tiroid', 'Gangguan metabolisme', 'Kesuburan', 'Jantung',
+    'Epilepsi', 'Depresi', 'Insomnia', 'Kulit', 'Mata', 'Antiseptik', 'Antijamur', 'Antivirus',
+    'Suplemen', 'Hormon',
+]
+
+
+def generate_items(n_items, n_suppliers=40, seed=0):
+    """Katalog item: nama, supplier, daftar fungsi obat, harga, popularitas, dan pola musiman."""
+    rng = np.random.default_rng(seed)
+    n_racikan = max(1, n_items // 50)
+    names = [f'OBAT {i:06d}' for i in range(n_items - n_racikan)]
+    names += [f'Racikan {i:04d}' for i in range(n_racikan)]
+
+    n_uses = rng.integers(1, 4, n_items)
+    use_ids = rng.integers(0, len(USES), (n_items, 3))
+    uses = [', '.join(USES[u] for u in row[:k]) for row, k in zip(use_ids, n_uses)]
+
+    popularity = rng.lognormal(0, 1.5, n_items)
+    return pd.DataFrame({
+        'Item': names,
+        'Supplier': [f'PT SUPPLIER {i:03d}' for i in rng.integers(0, n_suppliers, n_items)],
+        'Use': uses,
+        'Harga': np.round(rng.lognormal(10, 1.2, n_items), -2),
+        'Bobot': popularity / popularity.sum(),
+        'Musiman': rng.random(n_items) < 0.3,
+        'Puncak': rng.integers(1, 13, n_items),
+    })
+
+
+def generate_invoices(n_rows, n_items, n_months=12, start='2024-01', seed=0):
+    """Baris invoice sintetis untuk n_months bulan mulai dari start."""
+    rng = np.random.default_rng(seed)
+    items = generate_items(n_items, seed=seed)
+
+    item_idx = rng.choice(n_items, size=n_rows, p=items['Bobot'].to_numpy())
+    months = pd.period_range(start, periods=n_months, freq='M')
+
+    # Item musiman lebih sering muncul di sekitar bulan puncaknya
+    month_idx = rng.integers(0, n_months, n_rows)
+    seasonal = items['Musiman'].to_numpy()[item_idx]
+    peak = items['Puncak'].to_numpy()[item_idx] - 1
+    near_peak = (peak + rng.integers(-1, 2, n_rows)) % n_months
+    month_idx = np.where(seasonal & (rng.random(n_rows) < 0.7), near_peak, month_idx)
+
+    month_start = months.to_timestamp().to_numpy()[month_idx]
+    day = rng.integers(0, 28, n_rows).astype('timedelta64[D]')
+
+    qty = rng.poisson(3, n_rows) + 1
+    qty[rng.random(n_rows) < 0.01] = 0  # sebagian baris retur/kosong
+
+    def category(column):
+        values = items[column].to_numpy()
+        categories, codes = np.unique(values, return_inverse=True)
+        return pd.Categorical.from_codes(codes[item_idx], categories=categories)
+
+    return pd.DataFrame({
+        'Item': category('Item'),
+        'Supplier': category('Supplier'),
+        'Use': category('Use'),
+        'Qty': qty,
+        'Item Amount': qty * items['Harga'].to_numpy()[item_idx],
+        'Invoice Date': month_start + day,
+    })
+
+
+def generate_rainfall(n_months=12, start='2024-01', seed=0):
+    """Curah hujan harian (RR, mm) dengan pola musim hujan di awal dan akhir tahun."""
+    rng = np.random.default_rng(seed)
+    first = pd.Period(start, freq='M').to_timestamp()
+    dates = pd.date_range(first, first + pd.DateOffset(months=n_months) - pd.Timedelta(days=1), freq='D')
+    musim = 1 + np.cos((dates.month.to_numpy() - 1.5) / 12 * 2 * np.pi)
+    rr = rng.gamma(0.6, 12 * musim + 1)
+    return pd.DataFrame({'TANGGAL': dates, 'RR': np.round(rr, 1)})
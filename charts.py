@@ -0,0 +1,191 @@
+"""Lapisan grafik dashboard.
+
+Setiap grafik punya dua bentuk: figure matplotlib/seaborn yang dirender sekali
+ke PNG lalu di-cache (kunci: versi data + parameter grafik, figure langsung
+ditutup setelah dirender), dan spesifikasi Vega-Lite (Altair) yang digambar
+oleh browser sehingga server tidak merender apa pun.
+"""
+import io
+
+import altair as alt
+import matplotlib.pyplot as plt
+import pandas as pd
+import seaborn as sns
+import streamlit as st
+
+import diagnostics
+
+# Palet warna cluster
+cluster_palette = {
+    1: '#1f77b4',
+    2: '#ff7f0e',
+    3: '#2ca02c'
+}
+
+MODES = {"Gambar (matplotlib)": 'matplotlib', "Interaktif (Vega-Lite)": 'vega'}
+
+RAIN_LINES = [(100, 'red', 'Batas Rendah'), (300, 'orange', 'Batas Menengah'), (500, 'green', 'Batas Tinggi')]
+
+
+# --- MATPLOTLIB ---
+def elbow_figure(metrics_k):
+    fig, ax = plt.subplots()
+    ax.plot(metrics_k['k'], metrics_k['SSE'], marker='o', linestyle='--')
+    ax.set_xlabel("Jumlah Cluster")
+    ax.set_ylabel("SSE")
+    ax.set_title("Elbow Method")
+    return fig
+
+
+def cluster_pie_figure(cluster_counts, cluster_labels):
+    # Ukuran figure diperlebar untuk beri ruang legend
+    fig, ax = plt.subplots(figsize=(8, 6))
+    wedges, texts, autotexts = ax.pie(
+        cluster_counts,
+        labels=[f"Cluster {i}" for i in cluster_counts.index],
+        autopct='%1.1f%%',
+        colors=[cluster_palette[int(i)] for i in cluster_counts.index]
+    )
+    ax.set_title("Distribusi Cluster")
+
+    # Buat legend di pojok kanan atas, tidak menimpa chart
+    legend_labels = [f"Cluster {i}: {cluster_labels[i]}" for i in cluster_counts.index]
+    ax.legend(
+        wedges,
+        legend_labels,
+        title="Cluster",
+        loc='upper right',
+        bbox_to_anchor=(1.4, 1)  # posisi lebih ke kanan
+    )
+    return fig
+
+
+def mean_bar_figure(mean_data, col):
+    fig, ax = plt.subplots()
+    sns.barplot(data=mean_data, x='Cluster', y=col,
+                palette=[cluster_palette[int(i)] for i in mean_data['Cluster']], ax=ax)
+    ax.set_title(f"Rata-rata {col} per Cluster")
+    return fig
+
+
+def use_bar_figure(use_qty, cluster):
+    fig, ax = plt.subplots(figsize=(10, 5))
+    sns.barplot(data=use_qty, x='Use', y='Qty', color=cluster_palette[cluster], ax=ax)
+    ax.set_title(f"Top 10 Fungsi Obat Cluster {cluster}")
+    ax.set_xticks(ax.get_xticks(), ax.get_xticklabels(), rotation=45, ha='right')
+    return fig
+
+
+def rainfall_figure(monthly_sum, title):
+    fig, ax = plt.subplots(figsize=(10, 5))
+    ax.plot(monthly_sum['MonthName'], monthly_sum['RR_BULAN'], marker='o', linewidth=2, color='darkgreen')
+    ax.set_title(title)
+    ax.set_xlabel("Bulan")
+    ax.set_ylabel("Curah Hujan (RR)")
+    ax.grid(True)
+    for value, color, label in RAIN_LINES:
+        ax.axhline(value, color=color, linestyle='--', label=label)
+    ax.legend()
+    return fig
+
+
+# --- VEGA-LITE ---
+def _cluster_color(clusters):
+    clusters = sorted(int(c) for c in clusters)
+    return alt.Color(
+        'Cluster:N',
+        scale=alt.Scale(domain=clusters, range=[cluster_palette[c] for c in clusters])
+    )
+
+
+def elbow_chart(metrics_k):
+    return alt.Chart(metrics_k, title="Elbow Method").mark_line(point=True, strokeDash=[6, 4]).encode(
+        x=alt.X('k:O', title="Jumlah Cluster"),
+        y=alt.Y('SSE:Q', title="SSE"),
+        tooltip=list(metrics_k.columns)
+    )
+
+
+def cluster_pie_chart(cluster_counts, cluster_labels):
+    df = cluster_counts.rename('Jumlah Item').rename_axis('Cluster').reset_index()
+    df['Karakteristik'] = df['Cluster'].map(cluster_labels)
+    df['Persen'] = df['Jumlah Item'] / df['Jumlah Item'].sum()
+    return alt.Chart(df, title="Distribusi Cluster").mark_arc().encode(
+        theta='Jumlah Item:Q',
+        color=_cluster_color(df['Cluster']),
+        tooltip=['Cluster', 'Karakteristik', 'Jumlah Item', alt.Tooltip('Persen:Q', format='.1%')]
+    )
+
+
+def mean_bar_chart(mean_data, col):
+    return alt.Chart(mean_data, title=f"Rata-rata {col} per Cluster").mark_bar().encode(
+        x='Cluster:O',
+        y=alt.Y(f'{col}:Q', title=col),
+        color=_cluster_color(mean_data['Cluster']),
+        tooltip=['Cluster', col]
+    )
+
+
+def use_bar_chart(use_qty, cluster):
+    return alt.Chart(use_qty, title=f"Top 10 Fungsi Obat Cluster {cluster}").mark_bar(
+        color=cluster_palette[cluster]
+    ).encode(
+        x=alt.X('Use:N', sort='-y', axis=alt.Axis(labelAngle=-45)),
+        y='Qty:Q',
+        tooltip=['Use', 'Qty']
+    )
+
+
+def rainfall_chart(monthly_sum, title):
+    line = alt.Chart(monthly_sum, title=title).mark_line(point=True, color='darkgreen').encode(
+        x=alt.X('MonthName:N', sort=list(monthly_sum['MonthName']), title="Bulan"),
+        y=alt.Y('RR_BULAN:Q', title="Curah Hujan (RR)"),
+        tooltip=['MonthName', 'RR_BULAN', 'Curah Hujan']
+    )
+    batas = pd.DataFrame(RAIN_LINES, columns=['RR', 'color', 'Batas'])
+    rules = alt.Chart(batas).mark_rule(strokeDash=[6, 4]).encode(
+        y='RR:Q',
+        color=alt.Color('Batas:N', scale=alt.Scale(domain=list(batas['Batas']), range=list(batas['color'])))
+    )
+    return line + rules
+
+
+FIGURES = {
+    'elbow': elbow_figure,
+    'cluster_pie': cluster_pie_figure,
+    'mean_bar': mean_bar_figure,
+    'use_bar': use_bar_figure,
+    'rainfall': rainfall_figure,
+}
+
+CHARTS = {
+    'elbow': elbow_chart,
+    'cluster_pie': cluster_pie_chart,
+    'mean_bar': mean_bar_chart,
+    'use_bar': use_bar_chart,
+    'rainfall': rainfall_chart,
+}
+
+
+def render_png(fig):
+    """Render figure ke PNG lalu tutup figure agar tidak menumpuk di proses server."""
+    try:
+        buf = io.BytesIO()
+        fig.savefig(buf, format='png', bbox_inches='tight', dpi=200)
+        return buf.getvalue()
+    finally:
+        plt.close(fig)
+
+
+@diagnostics.cache_data(name='chart_png', max_entries=256)
+def _cached_png(name, version, params, _data):
+    return render_png(FIGURES[name](_data, **dict(params)))
+
+
+def show(name, data, version, mode='matplotlib', **params):
+    """Tampilkan grafik `name`. Kunci cache PNG = (name, versi data, params)."""
+    with diagnostics.timed(f'chart:{name}', kind='chart', mode=mode):
+        if mode == 'vega':
+            st.altair_chart(CHARTS[name](data, **params), use_container_width=True)
+        else:
+            st.image(_cached_png(name, version, tuple(sorted(params.items())), data), use_container_width=True)
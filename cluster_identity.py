@@ -0,0 +1,138 @@
+"""Identitas cluster yang stabil antar refit.
+
+Label KMeans bisa berubah urutan setiap kali data atau versi sklearn berubah.
+Modul ini mencocokkan centroid hasil fit dengan centroid referensi
+(cluster_reference.json) memakai Hungarian matching, sehingga Cluster 1/2/3
+selalu berarti Seasonal/Fast/Slow. Aturan per item (misalnya PERGOVERIS)
+ditulis di tabel cluster_overrides.csv.
+
+Centroid referensi awal diturunkan dari rata-rata per cluster pada hasil
+skripsi (log1p dari rata-rata Qty, Item Amount, CV). Setelah hasil baru
+divalidasi, referensi bisa diperbarui dengan:
+
+    python cluster_identity.py update-reference
+"""
+import argparse
+import json
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import linear_sum_assignment
+
+BASE_DIR = Path(__file__).resolve().parent
+REFERENCE_FILE = BASE_DIR / 'cluster_reference.json'
+OVERRIDES_FILE = BASE_DIR / 'cluster_overrides.csv'
+
+
+def load_reference(path=REFERENCE_FILE):
+    return json.loads(Path(path).read_text())
+
+
+def load_overrides(path=OVERRIDES_FILE):
+    if not Path(path).exists():
+        return pd.DataFrame(columns=['Item', 'Cluster', 'Keterangan'])
+    return pd.read_csv(path)
+
+
+def cluster_names(reference):
+    """Peta id cluster -> nama karakteristik."""
+    return {c['id']: c['name'] for c in reference['clusters']}
+
+
+def match_clusters(centers, scaler, reference):
+    """Cocokkan centroid hasil fit (ruang terstandarisasi) ke id cluster referensi.
+
+    Mengembalikan array ids dengan ids[label_kmeans] = id cluster stabil. Bila
+    jumlah cluster tidak sama dengan referensi, dipakai urutan label KMeans + 1.
+    """
+    clusters = reference['clusters']
+    if len(centers) != len(clusters):
+        warnings.warn(
+            f"Jumlah cluster ({len(centers)}) tidak sama dengan referensi ({len(clusters)}); "
+            "label KMeans dipakai apa adanya."
+        )
+        return np.arange(1, len(centers) + 1)
+
+    ref_centers = pd.DataFrame(
+        [c['centroid'] for c in clusters], columns=reference['features']
+    )
+    features = list(getattr(scaler, 'feature_names_in_', reference['features']))
+    missing = set(features) - set(ref_centers.columns)
+    if missing:
+        warnings.warn(f"Fitur {sorted(missing)} tidak ada di referensi; label KMeans dipakai apa adanya.")
+        return np.arange(1, len(centers) + 1)
+    ref_scaled = scaler.transform(ref_centers[features])
+    cost = ((centers[:, None, :] - ref_scaled[None, :, :]) ** 2).sum(axis=2)
+    rows, cols = linear_sum_assignment(cost)
+
+    ids = np.empty(len(centers), dtype=int)
+    ids[rows] = [clusters[j]['id'] for j in cols]
+    return ids
+
+
+def apply_overrides(data_grouped, overrides):
+    """Terapkan aturan cluster per item dari tabel override."""
+    if overrides is None or overrides.empty:
+        return data_grouped
+    mapping = overrides.set_index('Item')['Cluster']
+    forced = data_grouped['Item'].map(mapping)
+    data_grouped['Cluster'] = forced.fillna(data_grouped['Cluster']).astype(int)
+    return data_grouped
+
+
+def reference_from_fit(data_grouped, features, reference):
+    """Bangun referensi baru dari rata-rata fitur per cluster pada hasil fit yang sudah divalidasi."""
+    centers = data_grouped.groupby('Cluster')[list(features)].mean()
+    names = cluster_names(reference)
+    return {
+        'features': list(features),
+        'clusters': [
+            {
+                'id': int(cluster),
+                'name': names.get(int(cluster), f"Cluster {cluster}"),
+                'centroid': [round(float(v), 3) for v in row],
+            }
+            for cluster, row in centers.iterrows()
+        ],
+    }
+
+
+def refit_reference(data_obat, reference, overrides=None, cluster_config=None):
+    """Fit ulang data mentah dan turunkan referensi baru dari cluster yang sudah dicocokkan.
+
+    Fit memakai referensi lama sehingga setiap id (dan namanya) tetap menunjuk
+    karakteristik yang sama walaupun urutan label KMeans berubah.
+    """
+    import pipeline_obat as pipeline
+
+    data = pipeline.compute_stability(pipeline.clean_data(data_obat))
+    data_grouped, _ = pipeline.fit_clusters(
+        pipeline.aggregate_items(data), reference=reference, overrides=overrides,
+        cluster_config=cluster_config
+    )
+    return reference_from_fit(data_grouped, pipeline.FEATURES, reference)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kelola centroid referensi cluster.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('update-reference', help="Simpan centroid hasil fit saat ini sebagai referensi.")
+    args = parser.parse_args(argv)
+
+    if args.command == 'update-reference':
+        import data_store
+        import pipeline_obat as pipeline
+
+        data_obat, _, _ = data_store.load_store()
+        reference = refit_reference(
+            data_obat, load_reference(), overrides=load_overrides(),
+            cluster_config=pipeline.cluster_config_from_env()
+        )
+        REFERENCE_FILE.write_text(json.dumps(reference, indent=2) + '\n')
+        print(json.dumps(reference, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,123 +1,195 @@
+import os
+
 import streamlit as st
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import silhouette_score, davies_bouldin_score
-
-# Palet warna cluster
-cluster_palette = {
-    1: '#1f77b4',
-    2: '#ff7f0e',
-    3: '#2ca02c'
-}
+
+import charts
+import cluster_identity
+import data_store
+import diagnostics
+import forecast
+import pipeline_obat as pipeline
+
+# Timer, delta memori, dan hit/miss cache setiap stage dicatat ke log
+# terstruktur (lihat diagnostics.py) dan bisa dilihat di panel Diagnostics.
+diagnostics.start_run()
 
 # --- LOAD DATA ---
-@st.cache_data
-def load_data():
-    url_obat = "https://docs.google.com/spreadsheets/d/188yRPLfbuGmT3A6WIJe-8pAUtBTljdutDD7HxG-iGSI/export?format=csv"
-    url_hujan = "https://docs.google.com/spreadsheets/d/1iV-HQsqU36-r3pjR-zUu33a4wM2LTk49nGLN_V6o1oY/export?format=csv"
-    data_obat = pd.read_csv(url_obat)
-    data_hujan = pd.read_csv(url_hujan)
-    data_hujan['TANGGAL'] = pd.to_datetime(data_hujan['TANGGAL'])
-    return data_obat, data_hujan
+# Data dibaca dari store Parquet lokal (lihat data_store.py). Sinkronisasi ke
+# Google Sheets hanya dilakukan bila store belum ada; pembaruan berikutnya
+# lewat `python data_store.py refresh`.
+@diagnostics.cache_data
+def load_data(store_version):
+    return data_store.load_store()
 
-data, data_hujan = load_data()
+if not data_store.has_store():
+    with st.spinner("Mengunduh data sumber ke store lokal..."), diagnostics.timed('data_store.sync'):
+        data_store.sync()
 
 # --- PREPROCESSING + CLUSTERING ---
-data = data[~data['Item'].str.contains('Racikan', case=False, na=False)]
-data = data[data['Qty'] > 0]
-data['Month'] = pd.to_datetime(data['Invoice Date']).dt.month
-
-qty_bulanan = data.groupby(['Item', 'Month'])['Qty'].sum().reset_index()
-stabilitas = qty_bulanan.groupby('Item')['Qty'].agg(['mean', 'std']).reset_index()
-stabilitas['CV'] = (stabilitas['std'] / stabilitas['mean']) * 100
-stabilitas = stabilitas[['Item', 'CV']]
-bulan_aktif = qty_bulanan.groupby('Item')['Month'].nunique().reset_index()
-bulan_aktif.rename(columns={'Month': 'Jumlah Bulan Muncul'}, inplace=True)
-stabilitas = stabilitas.merge(bulan_aktif, on='Item', how='left')
-data = data.merge(stabilitas, on='Item', how='left')
-data['CV'] = data['CV'].fillna(80)
-
-data_grouped = data.groupby(
-    ['Item', 'Supplier', 'Use', 'CV', 'Jumlah Bulan Muncul'],
-    as_index=False
-)[['Qty', 'Item Amount']].sum()
-
-data_grouped['Qty_log'] = np.log1p(data_grouped['Qty'])
-data_grouped['Item Amount_log'] = np.log1p(data_grouped['Item Amount'])
-data_grouped['CV_log'] = np.log1p(data_grouped['CV'])
-
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(data_grouped[['Qty_log', 'Item Amount_log', 'CV_log', 'Jumlah Bulan Muncul']])
-
-# --- KMeans ---
-kmeans = KMeans(n_clusters=3, random_state=42, n_init=10)
-labels = kmeans.fit_predict(X_scaled)
-data_grouped['Cluster'] = labels + 1
-
-# --- DATA EXPLODED ---
-data_final = pd.merge(
-    data,
-    data_grouped[['Item', 'Cluster']],
-    on='Item',
-    how='left'
-)
-
-data_grouped_clustered = data_final.groupby(
-    ['Item', 'Supplier', 'Use', 'Month', 'CV', 'Cluster'],
-    as_index=False
-)[['Qty', 'Item Amount']].sum()
-
-data_exploded = data_grouped_clustered.copy()
-data_exploded['Use'] = data_exploded['Use'].str.split(',')
-data_exploded = data_exploded.explode('Use')
-data_exploded['Use'] = data_exploded['Use'].str.strip()
-
-# PERGOVERIS rules
-data_exploded = data_exploded[
-    ~((data_exploded['Item'] == 'PERGOVERIS 150 IU/75 IU') & (data_exploded['Cluster'] == 2))
-]
-data_exploded.loc[
-    (data_exploded['Item'] == 'PERGOVERIS 150 IU/75 IU') & (data_exploded['Cluster'] == 1),
-    'Cluster'
-] = 2
-
-# Merge curah hujan
-monthly_sum = data_hujan.groupby(data_hujan['TANGGAL'].dt.month)['RR'].sum().reset_index()
-monthly_sum.columns = ['Month', 'RR_BULAN']
-data_exploded = data_exploded.merge(monthly_sum, on='Month', how='left')
+# Setiap stage di-cache dengan kunci hash isi data sumber + parameter stage.
+# Argumen berawalan "_" tidak di-hash ulang oleh Streamlit, sehingga rerun
+# akibat klik widget cukup membandingkan string versi saja.
+@diagnostics.cache_data
+def stage_stability(_data_obat, version, window_months=None):
+    # clean_data tidak di-cache tersendiri: hasilnya hanya dipakai di sini
+    data = pipeline.clean_data(_data_obat, window_months=window_months, lean=True)
+    return pipeline.compute_stability(data)
+
+@diagnostics.cache_data
+def stage_aggregate(_data_obat, version, window_months=None):
+    return pipeline.aggregate_items(stage_stability(_data_obat, version, window_months))
+
+# Backend klasterisasi dari environment (CLUSTER_BACKEND=kmeans|minibatch|sample),
+# tetap selama proses server berjalan
+CLUSTER_CONFIG = pipeline.cluster_config_from_env()
+
+# Parameter model dashboard; hasil precomputed hanya dipakai bila parameternya sama
+N_CLUSTERS = 3
+RANDOM_STATE = 42
+K_MAX = 8
+
+# Referensi centroid dan override item ikut di-hash, sehingga perubahan file
+# cluster_reference.json / cluster_overrides.csv langsung memicu refit.
+@diagnostics.cache_data
+def stage_fit(_data_obat, version, reference, overrides, window_months=None, n_clusters=N_CLUSTERS,
+              random_state=RANDOM_STATE):
+    return pipeline.fit_clusters(
+        stage_aggregate(_data_obat, version, window_months),
+        n_clusters=n_clusters,
+        random_state=random_state,
+        reference=reference,
+        overrides=overrides,
+        cluster_config=CLUSTER_CONFIG
+    )
+
+@diagnostics.cache_data
+def stage_views(_data_obat, _data_hujan, version, reference, overrides, window_months=None):
+    # Argumen stage_fit harus sama persis dengan pemanggilan di stage_hasil agar kunci cache sama
+    data_grouped, _ = stage_fit(_data_obat, version, reference, overrides, window_months)
+    return pipeline.build_cluster_views(
+        stage_stability(_data_obat, version, window_months), data_grouped, _data_hujan
+    )
+
+# Indeks item -> fungsi obat hanya bergantung pada versi data, bukan hasil cluster
+@diagnostics.cache_data
+def stage_use_index(_data_obat, version, window_months=None):
+    return pipeline.build_use_index(stage_aggregate(_data_obat, version, window_months))
+
+# Kubus top-N untuk halaman Optimalisasi, dibangun sekali per hasil cluster
+@diagnostics.cache_data
+def stage_top_cube(_data_obat, _data_hujan, version, reference, overrides, window_months=None):
+    return pipeline.build_top_cube(
+        stage_views(_data_obat, _data_hujan, version, reference, overrides, window_months)
+    )
+
+@diagnostics.cache_data
+def stage_rainfall(_data_hujan, version):
+    return pipeline.monthly_rainfall(_data_hujan)
+
+# Sweep k untuk elbow method: dihitung sekali per versi data dan disimpan ke disk
+@diagnostics.cache_data(persist="disk")
+def stage_model_selection(_X_scaled, version, window_months=None, k_max=K_MAX, random_state=RANDOM_STATE,
+                          cluster_config=None):
+    return pipeline.model_selection_sweep(
+        _X_scaled, k_range=range(1, k_max + 1), random_state=random_state, cluster_config=cluster_config
+    )
+
+# Prediksi permintaan + rekomendasi order per item (regresi batch dengan curah hujan)
+@diagnostics.cache_data
+def stage_forecast(_data_obat, _data_hujan, version, reference, overrides, window_months=None):
+    data_grouped, _ = stage_fit(_data_obat, version, reference, overrides, window_months)
+    return forecast.forecast_orders(
+        stage_views(_data_obat, _data_hujan, version, reference, overrides, window_months),
+        data_grouped,
+        stage_rainfall(_data_hujan, version)
+    )
+
+# Tabel akhir yang ditampilkan halaman, disusun dari stage-stage di atas
+@diagnostics.cache_data
+def stage_hasil(_data_obat, _data_hujan, version, reference, overrides, window_months=None):
+    data = stage_stability(_data_obat, version, window_months)
+    data_grouped, X_scaled = stage_fit(_data_obat, version, reference, overrides, window_months)
+    return pipeline.collect_results(
+        data,
+        data_grouped,
+        stage_model_selection(X_scaled, version, window_months, cluster_config=CLUSTER_CONFIG),
+        stage_use_index(_data_obat, version, window_months),
+        stage_top_cube(_data_obat, _data_hujan, version, reference, overrides, window_months),
+        stage_rainfall(_data_hujan, version),
+        stage_forecast(_data_obat, _data_hujan, version, reference, overrides, window_months)
+    )
+
+# --- HASIL PRECOMPUTED ---
+# Hasil dari `python pipeline_obat.py --output-dir hasil` (misalnya job malam)
+# dipakai langsung bila versi data dan parameternya cocok dengan tampilan.
+HASIL_DIR = os.environ.get('HASIL_DIR', 'hasil')
+
+@diagnostics.cache_data
+def load_hasil(output_dir, created_at):
+    return pipeline.load_results(output_dir)
+
+data_obat, data_hujan, data_version = load_data(data_store.store_version())
+reference = cluster_identity.load_reference()
+overrides = cluster_identity.load_overrides()
 
 # --- SIDEBAR ---
 page = st.sidebar.radio("Pilih Halaman", ["Hasil Klasterisasi", "Optimalisasi"])
+show_diagnostics = st.sidebar.checkbox("Diagnostics")
+diagnostics_panel = st.sidebar.container()
+rentang_options = {"Semua data": None, "12 bulan terakhir": 12, "24 bulan terakhir": 24}
+rentang = st.sidebar.selectbox("Rentang Data", list(rentang_options))
+window_months = rentang_options[rentang]
+chart_mode = charts.MODES[st.sidebar.selectbox("Mode Grafik", list(charts.MODES))]
 st.sidebar.markdown("---")
 st.sidebar.markdown("Marsa Nabila | 2110512048")
 
+# Parameter yang harus sama persis dengan manifest (lihat params di pipeline_obat.main)
+expected_params = {
+    'data_version': data_version,
+    'k': N_CLUSTERS,
+    'features': pipeline.FEATURES,
+    'seed': RANDOM_STATE,
+    'window_months': window_months,
+    'k_max': K_MAX,
+    'identity_version': pipeline.content_hash(reference, overrides),
+    'cluster_config': CLUSTER_CONFIG,
+    'horizon': forecast.HORIZON,
+    'lead_time': forecast.LEAD_TIME,
+}
+manifest = pipeline.read_results_manifest(HASIL_DIR)
+if manifest is not None and manifest['params'] == expected_params:
+    hasil = load_hasil(HASIL_DIR, manifest['created_at'])
+    hasil_source = manifest['created_at']
+    st.sidebar.caption(f"Hasil precomputed: {manifest['created_at']}")
+    diagnostics.record_cache('hasil_precomputed', hit=True)
+else:
+    hasil = stage_hasil(data_obat, data_hujan, data_version, reference, overrides, window_months)
+    hasil_source = None
+    diagnostics.record_cache('hasil_precomputed', hit=False)
+
+data_grouped = hasil['data_grouped']
+
+# Versi tampilan: kunci cache grafik yang ikut berubah bila data, rentang, cluster,
+# atau sumber hasil (run dashboard vs hasil precomputed tertentu) berubah
+view_version = pipeline.content_hash(data_version, window_months, reference, overrides, hasil_source)
+
 # ==================== CLUSTERING OBAT ====================
 if page == "Hasil Klasterisasi":
     st.title("Dashboard Analisis Segmentasi Penjualan Obat Di RSU YPK Mandiri Menggunakan Metode K-Means")
 
     st.subheader("Preview Data")
-    st.dataframe(data.head())
+    st.dataframe(hasil['preview'])
 
     st.subheader("Elbow Method")
-    sse = []
-    for k in range(1, 9):
-        kmeans_tmp = KMeans(n_clusters=k, random_state=42, n_init=10)
-        kmeans_tmp.fit(X_scaled)
-        sse.append(kmeans_tmp.inertia_)
-    fig_elbow, ax = plt.subplots()
-    ax.plot(range(1,9), sse, marker='o', linestyle='--')
-    ax.set_xlabel("Jumlah Cluster")
-    ax.set_ylabel("SSE")
-    ax.set_title("Elbow Method")
-    st.pyplot(fig_elbow)
+    metrics_k = hasil['metrics']
+    charts.show('elbow', metrics_k, view_version, chart_mode)
 
     st.markdown("""
         Gambar grafik dari hasil metode elbow, dapat dilihat bahwa titik siku terjadi pada k = 3.
         """)
+
+    st.markdown("Perbandingan metrik evaluasi untuk setiap jumlah cluster (Silhouette lebih tinggi dan Davies-Bouldin lebih rendah menunjukkan cluster yang lebih baik):")
+    st.dataframe(metrics_k.set_index('k'), use_container_width=True)
     
     st.subheader("Hasil Clustering")
     # Hitung jumlah data per cluster
@@ -127,45 +199,13 @@ if page == "Hasil Klasterisasi":
     cluster_df.columns = ['Cluster', 'Jumlah Item']
     
     # Tambahkan kolom karakteristik
-    karakteristik_dict = {
-        1: 'Seasonal or Irregular Moving Items',
-        2: 'Fast Moving Items',
-        3: 'Slow Moving Items'
-    }
+    karakteristik_dict = cluster_identity.cluster_names(reference)
     cluster_df['Karakteristik'] = cluster_df['Cluster'].map(karakteristik_dict)
     st.write(cluster_df)
 
-    # Ukuran figure diperlebar untuk beri ruang legend
-    fig_pie, ax = plt.subplots(figsize=(8, 6))
-    
-    # Pie chart
-    wedges, texts, autotexts = ax.pie(
-        cluster_counts,
-        labels=[f"Cluster {i}" for i in cluster_counts.index],
-        autopct='%1.1f%%',
-        colors=[cluster_palette[int(i)] for i in cluster_counts.index]
-    )
-    ax.set_title("Distribusi Cluster")
-    
     # Tambahkan legend kustom
-    cluster_labels = {
-        1: "Seasonal or irregular moving items",
-        2: "Fast moving items",
-        3: "Slow moving items"
-    }
-    
-    # Buat legend di pojok kanan atas, tidak menimpa chart
-    legend_labels = [f"Cluster {i}: {cluster_labels[i]}" for i in cluster_counts.index]
-    ax.legend(
-        wedges,
-        legend_labels,
-        title="Cluster",
-        loc='upper right',
-        bbox_to_anchor=(1.4, 1)  # posisi lebih ke kanan
-    )
-    
-    # Tampilkan di Streamlit
-    st.pyplot(fig_pie)
+    cluster_labels = {i: name.capitalize() for i, name in karakteristik_dict.items()}
+    charts.show('cluster_pie', cluster_counts, view_version, chart_mode, cluster_labels=cluster_labels)
 
     st.markdown("""
         Gambar di atas menunjukkan hasil segmentasi item penjualan menggunakan metode K-Means Clustering yang dibagi menjadi tiga kelompok berdasarkan karakteristik pergerakan item, yaitu Fast Moving Items, Seasonal or Irregular Moving Items, dan Slow Moving Items.
@@ -183,25 +223,15 @@ if page == "Hasil Klasterisasi":
         """)
     # Menampilkan data dari setiap cluster
     for i in range(1, 4):
-        cluster_df = data_grouped[data_grouped['Cluster'] == i].copy()
-        cluster_df = cluster_df[['Item', 'Qty', 'Item Amount', 'Supplier', 'Use', 'CV', 'Jumlah Bulan Muncul', 'Cluster']]
+        cluster_df = data_grouped.loc[data_grouped['Cluster'] == i, ['Item', 'Qty', 'Item Amount', 'Supplier', 'Use', 'CV', 'Jumlah Bulan Muncul', 'Cluster']]
         st.markdown(f"### Data untuk Cluster {i}")
         st.dataframe(cluster_df)
     
-    mean_data = data_grouped.groupby('Cluster').agg({
-        'Qty': 'mean',
-        'Item Amount': 'mean',
-        'CV': 'mean',
-        'Jumlah Bulan Muncul': 'mean'
-    }).reset_index()
+    mean_data = hasil['cluster_means']
 
     st.subheader("Bar Chart Perbandingan Fitur per Cluster")
     for col in ['Qty', 'Item Amount', 'CV', 'Jumlah Bulan Muncul']:
-        fig_bar, ax = plt.subplots()
-        sns.barplot(data=mean_data, x='Cluster', y=col,
-                    palette=[cluster_palette[int(i)] for i in mean_data['Cluster']], ax=ax)
-        ax.set_title(f"Rata-rata {col} per Cluster")
-        st.pyplot(fig_bar)
+        charts.show('mean_bar', mean_data, view_version, chart_mode, col=col)
     
         # Tambahkan keterangan setelah grafik
         if col == 'Qty':
@@ -216,17 +246,12 @@ if page == "Hasil Klasterisasi":
 
     st.subheader("Top 10 Fungsi Obat per Cluster")
     
-    for cl in sorted(data_exploded['Cluster'].unique()):
-        use_qty = data_exploded[data_exploded['Cluster'] == cl] \
-            .groupby('Use')['Qty'].sum() \
-            .reset_index() \
-            .sort_values('Qty', ascending=False).head(10)
+    # Total Qty per cluster x fungsi obat (dihitung dari indeks sparse, tanpa explode)
+    use_by_cluster = hasil['use_totals']
+    for cl in sorted(use_by_cluster['Cluster'].unique()):
+        use_qty = use_by_cluster[use_by_cluster['Cluster'] == cl].nlargest(10, 'Qty')[['Use', 'Qty']]
         
-        fig, ax = plt.subplots(figsize=(10, 5))
-        sns.barplot(data=use_qty, x='Use', y='Qty', color=cluster_palette[cl], ax=ax)
-        ax.set_title(f"Top 10 Fungsi Obat Cluster {cl}")
-        ax.set_xticklabels(ax.get_xticklabels(), rotation=45, ha='right')
-        st.pyplot(fig)
+        charts.show('use_bar', use_qty, view_version, chart_mode, cluster=int(cl))
         
         # Tambahkan narasi atau penjelasan untuk tiap cluster
         if cl == 1:
@@ -269,23 +294,18 @@ if page == "Hasil Klasterisasi":
 if page == "Optimalisasi":
     st.title("Curah Hujan")
 
-    data_hujan['TANGGAL'] = pd.to_datetime(data_hujan['TANGGAL'])
-    data_hujan['Month'] = data_hujan['TANGGAL'].dt.month
-    monthly_sum = data_hujan.groupby('Month')['RR'].sum().reset_index()
+    # Curah hujan per periode tahun-bulan, dibatasi ke rentang data penjualan
+    monthly_sum = hasil['rainfall']
     nama_bulan = ['Jan', 'Feb', 'Mar', 'Apr', 'Mei', 'Jun', 'Jul', 'Agu', 'Sep', 'Okt', 'Nov', 'Des']
-    monthly_sum['MonthName'] = monthly_sum['Month'].apply(lambda x: nama_bulan[x - 1])
-
-    fig_line, ax = plt.subplots(figsize=(10,5))
-    ax.plot(monthly_sum['MonthName'], monthly_sum['RR'], marker='o', linewidth=2, color='darkgreen')
-    ax.set_title("Curah Hujan di Jakarta Pusat Tahun 2024")
-    ax.set_xlabel("Bulan")
-    ax.set_ylabel("Curah Hujan (RR)")
-    ax.grid(True)
-    ax.axhline(100, color='red', linestyle='--', label='Batas Rendah')
-    ax.axhline(300, color='orange', linestyle='--', label='Batas Menengah')
-    ax.axhline(500, color='green', linestyle='--', label='Batas Tinggi')
-    ax.legend()
-    st.pyplot(fig_line)
+    monthly_sum = monthly_sum.assign(
+        MonthName=[f"{nama_bulan[p.month - 1]} {p.year}" for p in monthly_sum['Periode']]
+    )
+
+    if monthly_sum.empty:
+        st.info("Data curah hujan BMKG tidak mencakup rentang data penjualan yang dipilih.")
+    else:
+        judul = f"Curah Hujan di Jakarta Pusat {monthly_sum['MonthName'].iloc[0]} - {monthly_sum['MonthName'].iloc[-1]}"
+        charts.show('rainfall', monthly_sum, view_version, chart_mode, title=judul)
 
     st.markdown("""
         Sumber: https://dataonline.bmkg.go.id.
@@ -294,9 +314,11 @@ if page == "Optimalisasi":
     
     st.title("Optimalisasi Pengadaan Stok Obat")
 
-    st.subheader("Top 10 Item per Cluster, Curah Hujan, dan Bulan")
-    st.markdown("""
-        Berikut merupakan daftar 10 besar item per Cluster berdasarkan Curah Hujan dan Bulan:
+    top_n = st.selectbox("Jumlah item teratas:", options=[10, 25, 50])
+
+    st.subheader(f"Top {top_n} Item per Cluster, Curah Hujan, dan Bulan")
+    st.markdown(f"""
+        Berikut merupakan daftar {top_n} besar item per Cluster berdasarkan Curah Hujan dan Bulan:
     """)
     
     # Peta nama bulan
@@ -306,68 +328,80 @@ if page == "Optimalisasi":
         9: 'September', 10: 'Oktober', 11: 'November', 12: 'Desember'
     }
     
-    df = data_grouped_clustered.copy()
-    
-    # Tambahkan kolom Curah Hujan berdasarkan kolom 'Month'
-    def kategori_curah_hujan(bulan):
-        if bulan == 2:
-            return 'Sangat Tinggi'
-        elif bulan in [1, 3, 12]:
-            return 'Tinggi'
-        elif bulan in [4, 6, 7, 9, 11]:
-            return 'Menengah'
-        elif bulan in [5, 8, 10]:
-            return 'Rendah'
-        else:
-            return 'Tidak Diketahui'
-    
-    df['Curah Hujan'] = df['Month'].apply(kategori_curah_hujan)
-    df['Month'] = df['Month'].map(bulan_map)
-    
-    # Filter kolom yang diperlukan
-    df_filtered = df[['Cluster', 'Curah Hujan', 'Month', 'Item', 'Supplier', 'Use', 'Qty']].copy()
-    
-    # Tambahkan Rank
-    df_filtered['Rank'] = df_filtered.groupby(['Cluster', 'Curah Hujan', 'Month'])['Qty'].rank(method='first', ascending=False)
-    
-    # Filter hanya top 10
-    df_top10 = df_filtered[df_filtered['Rank'] <= 10].drop(columns='Rank')
+    # Kubus top-N sudah diurutkan per (Cluster, Curah Hujan, Periode), sehingga
+    # filter di bawah cukup mengambil potongan baris tanpa ranking ulang
+    cube, cube_groups = hasil['top_items'], hasil['top_groups']
+    periode_labels = {p: f"{bulan_map[p.month]} {p.year}" for p in sorted(cube_groups['Periode'].unique())}
     
     # ================== FILTER INTERAKTIF ================== #
     # Pilihan filter
-    cluster_options = sorted(df_top10['Cluster'].unique())
-    bulan_options = df_top10['Month'].unique()
+    cluster_options = sorted(cube_groups['Cluster'].unique())
+    bulan_options = list(periode_labels.values())
     
     selected_clusters = st.multiselect("Pilih Cluster:", options=cluster_options, default=cluster_options)
     selected_bulan = st.multiselect("Pilih Bulan:", options=bulan_options, default=bulan_options)
+    selected_periode = [p for p, label in periode_labels.items() if label in selected_bulan]
     
-    # Terapkan filter ke df_top10
-    df_top10_filtered = df_top10[
-        (df_top10['Cluster'].isin(selected_clusters)) &
-        (df_top10['Month'].isin(selected_bulan))
-    ]
-    
-    # Urutkan data
-    df_top10_filtered = df_top10_filtered.sort_values(by=['Cluster', 'Curah Hujan', 'Month', 'Qty'], ascending=[True, True, True, False])
+    df_top_filtered, cluster_month_summary = pipeline.slice_top_cube(
+        cube, cube_groups, selected_clusters, selected_periode, top_n
+    )
+    df_top_filtered = df_top_filtered.assign(Month=df_top_filtered['Periode'].map(periode_labels))
     
     # Tampilkan hasil
-    st.dataframe(df_top10_filtered.reset_index(drop=True), use_container_width=True)
+    st.dataframe(
+        df_top_filtered[['Cluster', 'Curah Hujan', 'Month', 'Item', 'Supplier', 'Use', 'Qty']].reset_index(drop=True),
+        use_container_width=True
+    )
     
     # ================== RINGKASAN TOTAL PENJUALAN ================== #
     st.subheader("Rekapitulasi Total Penjualan (Qty) Obat Perbulan")
     st.write("Berikut ini merupakan jumlah total permintaan obat berdasarkan hasil cluster, dikategorikan menurut curah hujan dan bulan:")
     
-    # Group data berdasarkan Cluster, Curah Hujan, dan Bulan
+    # Total Qty top-N per Cluster, Curah Hujan, dan Bulan diambil dari kolom kumulatif kubus
     cluster_month_summary = (
-        df_top10_filtered.groupby(['Cluster', 'Curah Hujan', 'Month'])['Qty']
-        .sum()
-        .reset_index()
+        cluster_month_summary
+        .assign(Month=cluster_month_summary['Periode'].map(periode_labels))
         .sort_values(by=['Cluster', 'Curah Hujan', 'Qty'], ascending=[True, True, False])
+        [['Cluster', 'Curah Hujan', 'Month', 'Qty']]
     )
     
     # Tampilkan hasil
     st.dataframe(cluster_month_summary, use_container_width=True)
 
+    # ================== PREDIKSI & REKOMENDASI ORDER ================== #
+    st.subheader("Prediksi Permintaan dan Rekomendasi Order")
+    orders = hasil['forecast']
+    horizon_periode = sorted(orders['Bulan Puncak'].unique())
+
+    def label_bulan(periods):
+        return [f"{bulan_map[p.month]} {p.year}" for p in periods]
+
+    awal, akhir = label_bulan([horizon_periode[0], horizon_periode[-1]])
+    st.write(
+        f"Prediksi Qty hingga {forecast.HORIZON} bulan ke depan (bulan puncak antara {awal} dan {akhir}) "
+        "per item, dengan curah hujan sebagai kovariat. Rekomendasi Order = total prediksi + safety stock; "
+        f"Bulan Order = {forecast.LEAD_TIME} bulan sebelum bulan puncak prediksi. Status 'Segera' berarti bulan "
+        "order jatuh pada bulan data terakhir (order sekarang), 'Terlambat' berarti bulan order sudah lewat. "
+        "Stok yang ada belum diperhitungkan."
+    )
+    orders = orders[orders['Cluster'].isin(selected_clusters)]
+
+    order_summary = orders.groupby(['Cluster', 'Bulan Order', 'Status Order'], as_index=False).agg(
+        **{'Jumlah Item': ('Item', 'size'), 'Rekomendasi Order': ('Rekomendasi Order', 'sum')}
+    )
+    order_summary['Bulan Order'] = label_bulan(order_summary['Bulan Order'])
+    st.dataframe(order_summary, use_container_width=True)
+
+    orders = orders.sort_values('Rekomendasi Order', ascending=False).head(top_n)
+    st.dataframe(
+        orders.assign(**{
+            'Bulan Puncak': label_bulan(orders['Bulan Puncak']),
+            'Bulan Order': label_bulan(orders['Bulan Order']),
+        })[['Cluster', 'Item', 'Supplier', 'Use', 'Rata-rata Bulanan', 'Koef Hujan', 'Prediksi Total',
+            'Bulan Puncak', 'Safety Stock', 'Rekomendasi Order', 'Bulan Order', 'Status Order']].reset_index(drop=True),
+        use_container_width=True
+    )
+
 
     st.subheader("Ringkasan")
 
@@ -386,3 +420,8 @@ if page == "Optimalisasi":
     st.markdown("""
         Secara keseleuruhan, bulan Januari, Februari, Mei, dan November merupakan periode dengan permintaan tertinggi di berbagai cluster dan kategori curah hujan. Oleh karena itu, strategi pengadaan stok obat di rumah sakit sebaiknya mempertimbangkan karakteristik masing-masing cluster untuk menghindari kekurangan stok dan memastikan ketersediaan obat saat dibutuhkan.
     """)
+
+# --- DIAGNOSTICS ---
+diagnostics.finish_run(page=page, window_months=window_months, chart_mode=chart_mode)
+if show_diagnostics:
+    diagnostics.panel(diagnostics_panel)
@@ -0,0 +1,177 @@
+"""Penyimpanan data lokal (Parquet) untuk data penjualan obat dan curah hujan BMKG.
+
+Data diunduh sekali dari Google Sheets, lalu disimpan sebagai Parquet bertipe
+(tanggal sudah di-parse, kolom teks berulang sebagai categorical). Dashboard
+cukup membaca file lokal saat startup.
+
+    python data_store.py refresh            # sinkron ulang bila sumber berubah
+    python data_store.py refresh --force    # paksa tulis ulang
+    python data_store.py refresh --obat invoice.csv --hujan bmkg.csv   # offline
+    python data_store.py status
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+URL_OBAT = "https://docs.google.com/spreadsheets/d/188yRPLfbuGmT3A6WIJe-8pAUtBTljdutDD7HxG-iGSI/export?format=csv"
+URL_HUJAN = "https://docs.google.com/spreadsheets/d/1iV-HQsqU36-r3pjR-zUu33a4wM2LTk49nGLN_V6o1oY/export?format=csv"
+
+STORE_DIR = Path(os.environ.get('DATA_STORE_DIR', Path(__file__).resolve().parent / 'data'))
+MANIFEST = 'manifest.json'
+
+CATEGORY_COLUMNS = ['Item', 'Supplier', 'Use']
+
+
+def _prepare_obat(df):
+    df['Invoice Date'] = pd.to_datetime(df['Invoice Date'])
+    for col in CATEGORY_COLUMNS:
+        df[col] = df[col].astype('category')
+    return df
+
+
+def _prepare_hujan(df):
+    df['TANGGAL'] = pd.to_datetime(df['TANGGAL'])
+    return df
+
+
+SOURCES = {
+    'obat': (URL_OBAT, _prepare_obat),
+    'hujan': (URL_HUJAN, _prepare_hujan),
+}
+
+
+def _read_manifest(store_dir):
+    path = Path(store_dir) / MANIFEST
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def _fetch(source, previous):
+    """Ambil isi sumber (URL atau path lokal). Mengembalikan (bytes | None, header cache)."""
+    if not str(source).startswith(('http://', 'https://')):
+        return Path(source).read_bytes(), {}
+
+    request = urllib.request.Request(source)
+    if previous.get('etag'):
+        request.add_header('If-None-Match', previous['etag'])
+    if previous.get('last_modified'):
+        request.add_header('If-Modified-Since', previous['last_modified'])
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            headers = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+            }
+            return response.read(), headers
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return None, {}
+        raise
+
+
+def has_store(store_dir=STORE_DIR):
+    manifest = _read_manifest(store_dir)
+    return all(
+        name in manifest and (Path(store_dir) / manifest[name]['file']).exists()
+        for name in SOURCES
+    )
+
+
+def store_version(store_dir=STORE_DIR):
+    """Versi isi store, gabungan sha256 tiap sumber. Dipakai sebagai kunci cache."""
+    manifest = _read_manifest(store_dir)
+    return hashlib.sha256(
+        '|'.join(manifest.get(name, {}).get('sha256', '') for name in SOURCES).encode()
+    ).hexdigest()[:16]
+
+
+def sync(sources=None, force=False, store_dir=STORE_DIR):
+    """Sinkronkan store lokal. Sumber hanya di-parse ulang bila isinya berubah."""
+    store_dir = Path(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+    manifest = _read_manifest(store_dir)
+    sources = {**{name: url for name, (url, _) in SOURCES.items()}, **(sources or {})}
+
+    status = {}
+    for name, source in sources.items():
+        prepare = SOURCES[name][1]
+        filename = f'{name}.parquet'
+        # Validator ETag/Last-Modified hanya dikirim bila file parquet masih ada;
+        # bila file dihapus, sumber harus diunduh ulang penuh (bukan 304)
+        exists = (store_dir / filename).exists()
+        previous = manifest.get(name, {}) if exists and not force else {}
+
+        raw, headers = _fetch(source, previous)
+        if raw is None and (store_dir / filename).exists():
+            status[name] = 'unchanged'
+            continue
+
+        digest = hashlib.sha256(raw).hexdigest()
+        if digest == previous.get('sha256') and (store_dir / filename).exists():
+            status[name] = 'unchanged'
+            continue
+
+        df = prepare(pd.read_csv(io.BytesIO(raw)))
+        tmp = store_dir / f'{filename}.tmp'
+        df.to_parquet(tmp, engine='pyarrow', index=False)
+        os.replace(tmp, store_dir / filename)
+
+        manifest[name] = {
+            'file': filename,
+            'source': str(source),
+            'sha256': digest,
+            'rows': len(df),
+            'synced_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            **{k: v for k, v in headers.items() if v},
+        }
+        status[name] = 'updated'
+
+    (store_dir / MANIFEST).write_text(json.dumps(manifest, indent=2))
+    return status
+
+
+def load_store(store_dir=STORE_DIR):
+    """Baca data_obat, data_hujan dari store lokal beserta versinya."""
+    manifest = _read_manifest(store_dir)
+    frames = [
+        pd.read_parquet(Path(store_dir) / manifest[name]['file'], engine='pyarrow', memory_map=True)
+        for name in SOURCES
+    ]
+    return (*frames, store_version(store_dir))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kelola data store lokal dashboard clustering obat.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    refresh = sub.add_parser('refresh', help="Sinkronkan data dari Google Sheets atau file CSV.")
+    refresh.add_argument('--obat', help="URL/path CSV data penjualan obat (default: Google Sheets).")
+    refresh.add_argument('--hujan', help="URL/path CSV curah hujan BMKG (default: Google Sheets).")
+    refresh.add_argument('--force', action='store_true', help="Tulis ulang meskipun sumber tidak berubah.")
+    refresh.add_argument('--store-dir', default=STORE_DIR)
+
+    status = sub.add_parser('status', help="Tampilkan isi manifest store.")
+    status.add_argument('--store-dir', default=STORE_DIR)
+
+    args = parser.parse_args(argv)
+    if args.command == 'refresh':
+        sources = {name: getattr(args, name) for name in SOURCES if getattr(args, name)}
+        result = sync(sources, force=args.force, store_dir=args.store_dir)
+        for name, state in result.items():
+            print(f"{name}: {state}")
+    else:
+        print(json.dumps(_read_manifest(args.store_dir), indent=2))
+        print(f"version: {store_version(args.store_dir)}")
+
+
+if __name__ == '__main__':
+    main()
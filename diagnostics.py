@@ -0,0 +1,173 @@
+"""Instrumentasi ringan: timer, delta memori, dan hit/miss cache per stage.
+
+Setiap pengukuran ditulis ke log terstruktur (satu objek JSON per baris,
+default logs/diagnostics.jsonl, bisa diganti lewat env DIAGNOSTICS_LOG) dan
+dikumpulkan per run script sehingga bisa ditampilkan di panel "Diagnostics"
+pada sidebar dashboard.
+
+Hit/miss st.cache_data dihitung dengan membungkus fungsi yang di-cache: setiap
+panggilan dicatat, sedangkan badan fungsi hanya berjalan saat cache miss.
+"""
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+LOG_FILE = os.environ.get(
+    'DIAGNOSTICS_LOG', str(Path(__file__).resolve().parent / 'logs' / 'diagnostics.jsonl')
+)
+
+logger = logging.getLogger('obat.diagnostics')
+
+# Counter cache berlaku untuk seluruh proses server (semua sesi);
+# event timer disimpan per thread script run.
+CALLS = Counter()
+MISSES = Counter()
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def _configure_logger():
+    if logger.handlers:
+        return
+    path = Path(LOG_FILE)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handler = logging.FileHandler(path, encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def rss_mb():
+    """RSS proses saat ini dalam MB (Linux); selain itu puncak RSS, atau NaN bila tidak tersedia."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, AttributeError, ValueError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return np.nan
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+
+
+def log_event(event, **fields):
+    """Tulis satu event ke log terstruktur dan kembalikan record-nya."""
+    record = {'ts': datetime.now(timezone.utc).isoformat(timespec='milliseconds'), 'event': event, **fields}
+    _configure_logger()
+    logger.info(json.dumps(record, default=str))
+    return record
+
+
+def start_run():
+    """Mulai pengumpulan event untuk satu run script dashboard."""
+    _local.events = []
+    _local.started = time.perf_counter()
+
+
+def current_run():
+    return getattr(_local, 'events', [])
+
+
+def finish_run(**fields):
+    """Catat ringkasan run (total waktu dan jumlah event) ke log."""
+    started = getattr(_local, 'started', None)
+    seconds = time.perf_counter() - started if started is not None else np.nan
+    return log_event('run', seconds=round(seconds, 6), events=len(current_run()), **fields)
+
+
+@contextmanager
+def timed(name, kind='stage', **fields):
+    """Ukur waktu dan perubahan RSS di sekitar satu blok kode."""
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record = log_event(
+            'timer', name=name, kind=kind,
+            seconds=round(time.perf_counter() - start, 6),
+            rss_delta_mb=round(rss_mb() - rss_before, 3),
+            **fields
+        )
+        events = getattr(_local, 'events', None)
+        if events is not None:
+            events.append(record)
+
+
+def record_cache(name, hit):
+    with _lock:
+        CALLS[name] += 1
+        if not hit:
+            MISSES[name] += 1
+    log_event('cache', name=name, hit=hit)
+
+
+def cache_data(func=None, *, name=None, **cache_kwargs):
+    """Pengganti st.cache_data yang mencatat hit/miss dan mengukur waktu saat miss.
+
+    Argumen cache_kwargs diteruskan apa adanya ke st.cache_data (persist,
+    max_entries, ...). Kunci cache tetap sama karena nama dan signature fungsi
+    asli dipertahankan lewat functools.wraps.
+    """
+    def decorator(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def compute(*args, **kwargs):
+            _local.miss_stack[-1] = True
+            with timed(label, kind='cache_miss'):
+                return func(*args, **kwargs)
+
+        cached = st.cache_data(**cache_kwargs)(compute)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # Stack karena fungsi ter-cache bisa memanggil fungsi ter-cache lain
+            stack = _local.__dict__.setdefault('miss_stack', [])
+            stack.append(False)
+            try:
+                return cached(*args, **kwargs)
+            finally:
+                record_cache(label, hit=not stack.pop())
+
+        wrapper.clear = cached.clear
+        return wrapper
+
+    return decorator(func) if func is not None else decorator
+
+
+def cache_stats():
+    """Tabel panggilan, hit, miss, dan hit rate per cache sejak server dimulai."""
+    with _lock:
+        stats = pd.DataFrame({'Panggilan': pd.Series(CALLS), 'Miss': pd.Series(MISSES)})
+    stats = stats.fillna(0).astype(int).rename_axis('Cache').reset_index()
+    stats['Hit'] = stats['Panggilan'] - stats['Miss']
+    stats['Hit Rate'] = stats['Hit'] / stats['Panggilan']
+    return stats[['Cache', 'Panggilan', 'Hit', 'Miss', 'Hit Rate']]
+
+
+def panel(container):
+    """Tampilkan timer run ini dan statistik cache di container (misalnya sidebar)."""
+    events = pd.DataFrame(current_run(), columns=['name', 'kind', 'seconds', 'rss_delta_mb'])
+    started = getattr(_local, 'started', None)
+    if started is not None:
+        container.caption(f"Run ini: {time.perf_counter() - started:.2f} detik, log: {LOG_FILE}")
+    container.markdown("**Timer (run ini)**")
+    container.dataframe(events.rename(columns={
+        'name': 'Stage', 'kind': 'Jenis', 'seconds': 'Detik', 'rss_delta_mb': 'Δ RSS (MB)'
+    }), hide_index=True)
+    container.markdown("**Cache**")
+    container.dataframe(cache_stats(), hide_index=True)
@@ -0,0 +1,242 @@
+"""Mode inkremental: perbarui fitur dan cluster per bulan tanpa refit penuh.
+
+Statistik cukup per item (Qty bulanan, jumlah bulan aktif, sum, sum of squares)
+disimpan di state, sehingga CV dan Jumlah Bulan Muncul untuk data bulan baru
+diperbarui sebanding dengan jumlah baris baru. Item yang berubah di-assign ke
+centroid tersimpan; centroid diperbarui secara tepat lewat jumlah vektor per
+cluster. Refit penuh hanya dilakukan bila inersia rata-rata per item naik
+melewati ambang batas.
+
+    python incremental.py init                       # bangun state dari data store
+    python incremental.py update invoice_baru.csv    # tambahkan bulan baru
+"""
+import argparse
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+import cluster_identity
+import data_store
+import pipeline_obat as pipeline
+
+STATE_FILE = 'incremental_state.joblib'
+ITEM_KEYS = ['Item', 'Supplier', 'Use']
+
+
+@dataclass
+class IncrementalState:
+    monthly: pd.Series            # Qty per (Item, Periode)
+    item_stats: pd.DataFrame      # n, sum, sumsq per Item
+    grouped: pd.DataFrame         # Qty, Item Amount, Cluster per (Item, Supplier, Use)
+    scaler: object
+    centroids: np.ndarray         # centroid di ruang fitur terstandarisasi
+    cluster_sums: np.ndarray      # jumlah vektor fitur per cluster
+    cluster_counts: np.ndarray
+    baseline_inertia: float       # inersia rata-rata per item saat refit terakhir
+    n_clusters: int = 3
+    random_state: int = 42
+    reference: dict = None
+    history: list = field(default_factory=list)
+
+
+def _stats_to_features(item_stats):
+    """CV (%) dan Jumlah Bulan Muncul dari statistik cukup, setara std(ddof=1)/mean."""
+    n = item_stats['n']
+    mean = item_stats['sum'] / n
+    var = ((item_stats['sumsq'] - item_stats['sum'] ** 2 / n) / (n - 1)).clip(lower=0)
+    cv = (np.sqrt(var) / mean * 100).where(n > 1).fillna(80)
+    return pd.DataFrame({'CV': cv, 'Jumlah Bulan Muncul': n})
+
+
+def _feature_frame(grouped, item_stats):
+    df = grouped.join(_stats_to_features(item_stats), on='Item')
+    df['Qty_log'] = np.log1p(df['Qty'])
+    df['Item Amount_log'] = np.log1p(df['Item Amount'])
+    df['CV_log'] = np.log1p(df['CV'])
+    return df
+
+
+def _clean(rows):
+    """clean_data + kunci item sebagai object agar data lama dan baru bisa digabung."""
+    data = pipeline.clean_data(rows)
+    data[ITEM_KEYS] = data[ITEM_KEYS].astype(object)
+    return data
+
+
+def _transform(state, df):
+    return state.scaler.transform(df[pipeline.FEATURES])
+
+
+def _refit(state):
+    """Refit penuh scaler + KMeans dari state, lalu reset ringkasan cluster."""
+    df = _feature_frame(state.grouped, state.item_stats)
+    scaler, kmeans, X_scaled = pipeline.fit_models(
+        df, n_clusters=state.n_clusters, random_state=state.random_state
+    )
+    # Petakan label ke id cluster stabil, centroid diurutkan mengikuti id
+    ids = cluster_identity.match_clusters(kmeans.cluster_centers_, scaler, state.reference)
+    labels = ids[kmeans.labels_] - 1
+    state.scaler = scaler
+    state.centroids = np.empty_like(kmeans.cluster_centers_)
+    state.centroids[ids - 1] = kmeans.cluster_centers_
+    state.cluster_sums = np.zeros_like(kmeans.cluster_centers_)
+    np.add.at(state.cluster_sums, labels, X_scaled)
+    state.cluster_counts = np.bincount(labels, minlength=state.n_clusters).astype(float)
+    state.baseline_inertia = kmeans.inertia_ / len(X_scaled)
+    state.grouped['Cluster'] = labels.astype(int) + 1
+    return state
+
+
+def init_state(data, n_clusters=3, random_state=42, reference=None):
+    """Bangun state dari riwayat penuh data invoice mentah."""
+    data = _clean(data)
+    monthly = data.groupby(['Item', 'Periode'])['Qty'].sum()
+    item_stats = monthly.groupby(level='Item').agg(
+        n='count', sum='sum', sumsq=lambda q: (q ** 2).sum()
+    ).astype(float)
+    grouped = data.groupby(ITEM_KEYS)[['Qty', 'Item Amount']].sum()
+    state = IncrementalState(
+        monthly=monthly,
+        item_stats=item_stats,
+        grouped=grouped,
+        scaler=None,
+        centroids=None,
+        cluster_sums=None,
+        cluster_counts=None,
+        baseline_inertia=np.nan,
+        n_clusters=n_clusters,
+        random_state=random_state,
+        reference=reference or cluster_identity.load_reference(),
+    )
+    return _refit(state)
+
+
+def update_state(state, new_rows, drift_threshold=0.25, update_centroids=True):
+    """Tambahkan baris invoice baru ke state.
+
+    Item yang tersentuh di-assign ulang ke centroid terdekat. Bila inersia rata-rata
+    naik lebih dari drift_threshold (relatif terhadap refit terakhir), dilakukan
+    refit penuh. Pergeseran rata-rata fitur terstandarisasi hanya dilaporkan:
+    Qty, Item Amount, dan Jumlah Bulan Muncul terus bertambah setiap bulan sehingga
+    rata-ratanya naik walaupun struktur cluster tidak berubah.
+    """
+    new = _clean(new_rows)
+    touched_items = pd.Index(new['Item'].unique())
+
+    # Keluarkan kontribusi lama item yang tersentuh dari ringkasan cluster
+    row_mask = state.grouped.index.get_level_values('Item').isin(touched_items)
+    before = state.grouped[row_mask]
+    if len(before):
+        X_before = _transform(state, _feature_frame(before, state.item_stats))
+        old_labels = before['Cluster'].to_numpy() - 1
+        np.subtract.at(state.cluster_sums, old_labels, X_before)
+        state.cluster_counts -= np.bincount(old_labels, minlength=state.n_clusters)
+
+    # Qty bulanan + sum / sum of squares per item
+    delta = new.groupby(['Item', 'Periode'])['Qty'].sum()
+    old = state.monthly.reindex(delta.index, fill_value=0)
+    updated = old + delta
+    state.monthly = updated.combine_first(state.monthly)
+
+    changes = pd.DataFrame({
+        'n': (old == 0).astype(float),
+        'sum': delta.astype(float),
+        'sumsq': (updated ** 2 - old ** 2).astype(float),
+    }).groupby(level='Item').sum()
+    state.item_stats = changes.add(state.item_stats, fill_value=0)
+
+    grouped_delta = new.groupby(ITEM_KEYS)[['Qty', 'Item Amount']].sum()
+    state.grouped = grouped_delta.add(state.grouped[['Qty', 'Item Amount']], fill_value=0).join(
+        state.grouped['Cluster']
+    )
+
+    # Assign item yang tersentuh ke centroid tersimpan
+    row_mask = state.grouped.index.get_level_values('Item').isin(touched_items)
+    after = _feature_frame(state.grouped[row_mask], state.item_stats)
+    X_after = _transform(state, after)
+    distances = ((X_after[:, None, :] - state.centroids[None, :, :]) ** 2).sum(axis=2)
+    labels = distances.argmin(axis=1)
+    state.grouped['Cluster'] = state.grouped['Cluster'].fillna(0).astype(int)
+    reassigned = int((state.grouped.loc[row_mask, 'Cluster'].to_numpy() != labels + 1).sum())
+    state.grouped.loc[row_mask, 'Cluster'] = labels + 1
+    np.add.at(state.cluster_sums, labels, X_after)
+    state.cluster_counts += np.bincount(labels, minlength=state.n_clusters)
+    if update_centroids:
+        nonempty = state.cluster_counts > 0
+        state.centroids[nonempty] = state.cluster_sums[nonempty] / state.cluster_counts[nonempty, None]
+
+    # Cek drift pada seluruh item (O(jumlah item), bukan O(jumlah baris))
+    X_all = _transform(state, _feature_frame(state.grouped, state.item_stats))
+    all_labels = state.grouped['Cluster'].to_numpy() - 1
+    inertia = ((X_all - state.centroids[all_labels]) ** 2).sum() / len(X_all)
+    inertia_ratio = inertia / state.baseline_inertia - 1
+    feature_shift = float(np.abs(X_all.mean(axis=0)).max())
+
+    refit = inertia_ratio > drift_threshold
+    if refit:
+        _refit(state)
+
+    report = {
+        'new_rows': len(new),
+        'touched_items': len(touched_items),
+        'reassigned_items': reassigned,
+        'inertia_drift': float(inertia_ratio),
+        'feature_shift': feature_shift,
+        'refit': bool(refit),
+    }
+    state.history.append(report)
+    return report
+
+
+def to_data_grouped(state):
+    """Bentuk data_grouped (sama seperti pipeline_obat.aggregate_items + Cluster) dari state."""
+    df = _feature_frame(state.grouped, state.item_stats).reset_index()
+    columns = ['Item', 'Supplier', 'Use', 'CV', 'Jumlah Bulan Muncul', 'Qty', 'Item Amount',
+               'Qty_log', 'Item Amount_log', 'CV_log', 'Cluster']
+    return cluster_identity.apply_overrides(df[columns], cluster_identity.load_overrides())
+
+
+def save_state(state, store_dir=data_store.STORE_DIR):
+    joblib.dump(state, Path(store_dir) / STATE_FILE)
+
+
+def load_state(store_dir=data_store.STORE_DIR):
+    return joblib.load(Path(store_dir) / STATE_FILE)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Update inkremental fitur dan cluster obat.")
+    parser.add_argument('--store-dir', default=data_store.STORE_DIR)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    init = sub.add_parser('init', help="Bangun state dari seluruh data di store.")
+    init.add_argument('--k', type=int, default=3)
+    init.add_argument('--seed', type=int, default=42)
+
+    update = sub.add_parser('update', help="Tambahkan file CSV/Parquet berisi invoice baru.")
+    update.add_argument('path')
+    update.add_argument('--drift-threshold', type=float, default=0.25)
+    update.add_argument('--export', help="Tulis data_grouped hasil update ke CSV.")
+
+    args = parser.parse_args(argv)
+    if args.command == 'init':
+        data_obat, _, _ = data_store.load_store(args.store_dir)
+        state = init_state(data_obat, n_clusters=args.k, random_state=args.seed)
+        print(f"state dibuat: {len(state.grouped)} baris item")
+    else:
+        state = load_state(args.store_dir)
+        path = Path(args.path)
+        new_rows = pd.read_parquet(path) if path.suffix == '.parquet' else pd.read_csv(path)
+        report = update_state(state, new_rows, drift_threshold=args.drift_threshold)
+        for key, value in report.items():
+            print(f"{key}: {value}")
+        if args.export:
+            to_data_grouped(state).to_csv(args.export, index=False)
+    save_state(state, args.store_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,563 @@
+"""Pipeline klasterisasi obat: preprocessing, fitur stabilitas, KMeans, dan tabel turunan.
+
+Bisa dipakai sebagai modul (dashboard) atau dijalankan tanpa Streamlit untuk
+menghitung semua hasil lalu menyimpannya ke Parquet/CSV:
+
+    python pipeline_obat.py --output-dir hasil
+    python pipeline_obat.py --obat invoice.csv --hujan bmkg.csv --k 3 --seed 42 --format csv
+    python pipeline_obat.py --backend minibatch --batch-size 2048 --compare-backends
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from scipy import sparse
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import adjusted_rand_score, davies_bouldin_score, silhouette_score
+from sklearn.preprocessing import StandardScaler
+
+import cluster_identity
+import forecast
+
+# Fitur yang dipakai untuk klasterisasi
+FEATURES = ['Qty_log', 'Item Amount_log', 'CV_log', 'Jumlah Bulan Muncul']
+
+# Batas kategori curah hujan bulanan (mm)
+RAIN_BINS = [-np.inf, 100, 300, 500, np.inf]
+RAIN_LABELS = ['Rendah', 'Menengah', 'Tinggi', 'Sangat Tinggi']
+
+# Backend klasterisasi pada X_scaled: 'kmeans' (exact), 'minibatch' (MiniBatchKMeans),
+# atau 'sample' (KMeans pada sampel acak lalu predict untuk semua item)
+CLUSTER_BACKENDS = ['kmeans', 'minibatch', 'sample']
+CLUSTER_CONFIG = {'backend': 'kmeans', 'batch_size': 1024, 'sample_size': 10_000}
+
+
+def content_hash(*parts):
+    """Hash isi DataFrame/parameter, dipakai sebagai kunci cache tiap stage."""
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, pd.DataFrame):
+            h.update(repr(list(part.columns)).encode())
+            h.update(pd.util.hash_pandas_object(part, index=True).values.tobytes())
+        else:
+            h.update(repr(part).encode())
+    return h.hexdigest()[:16]
+
+
+# --- STAGE 1: CLEAN ---
+def compact_dtypes(data):
+    """Mode hemat memori: teks berulang jadi categorical, angka di-downcast bila aman.
+
+    Qty dan Item Amount yang bernilai bulat disimpan sebagai integer terkecil
+    (penjumlahan groupby tetap di int64, jadi hasilnya persis). Item Amount
+    pecahan tetap float64: penjumlahan groupby mengikuti dtype kolom, sehingga
+    float32 akan mengubah total (dan hasil dashboard berbeda dari export CLI).
+    """
+    for col in ['Item', 'Supplier', 'Use']:
+        if not isinstance(data[col].dtype, pd.CategoricalDtype):
+            data[col] = data[col].astype('category')
+    data['Qty'] = pd.to_numeric(data['Qty'], downcast='integer')
+    data['Item Amount'] = pd.to_numeric(data['Item Amount'], downcast='integer')
+    return data
+
+
+def clean_data(data, window_months=None, lean=False):
+    """Buang item Racikan dan Qty <= 0, lalu tambahkan kolom Periode (tahun-bulan).
+
+    Bila window_months diisi, hanya periode N bulan terakhir yang dipakai. Semua
+    filter digabung dalam satu mask sehingga data hanya disalin sekali.
+    """
+    periode = pd.to_datetime(data['Invoice Date']).dt.to_period('M')
+    mask = ~data['Item'].str.contains('Racikan', case=False, na=False) & (data['Qty'] > 0)
+    if window_months:
+        mask &= periode > periode[mask].max() - window_months
+
+    rows = np.flatnonzero(mask.to_numpy())
+    data = data.take(rows)
+    data['Periode'] = periode.array[rows]
+    if lean:
+        data = compact_dtypes(data)
+    return data
+
+
+# --- STAGE 2: FITUR STABILITAS ---
+def _map_item(items, mapping):
+    """mapping[Item] untuk setiap baris; untuk categorical lookup cukup sekali per kategori."""
+    if not isinstance(items.dtype, pd.CategoricalDtype):
+        return np.asarray(items.map(mapping))
+    # Nilai per kategori + NaN di posisi terakhir untuk kode -1 (Item kosong)
+    per_category = np.append(mapping.reindex(items.cat.categories).to_numpy(dtype=float), np.nan)
+    values = per_category[items.cat.codes.to_numpy()]
+    if mapping.dtype.kind in 'iu' and not np.isnan(values).any():
+        values = values.astype(mapping.dtype)
+    return values
+
+
+def compute_stability(data):
+    """Hitung CV dan Jumlah Bulan Muncul per item, lalu tambahkan sebagai kolom data.
+
+    Kolom ditambahkan langsung ke data (tanpa merge yang menyalin seluruh baris).
+    """
+    qty_bulanan = data.groupby(['Item', 'Periode'], observed=True)['Qty'].sum()
+    stabilitas = qty_bulanan.groupby(level='Item', observed=True).agg(['mean', 'std', 'count'])
+    stabilitas['CV'] = (stabilitas['std'] / stabilitas['mean']) * 100
+    data['CV'] = _map_item(data['Item'], stabilitas['CV'])
+    data['CV'] = data['CV'].fillna(80)
+    data['Jumlah Bulan Muncul'] = _map_item(data['Item'], stabilitas['count'])
+    return data
+
+
+# --- STAGE 3: AGREGASI PER ITEM ---
+def aggregate_items(data):
+    """Jumlahkan Qty dan Item Amount per item, lalu tambahkan fitur log."""
+    data_grouped = data.groupby(
+        ['Item', 'Supplier', 'Use', 'CV', 'Jumlah Bulan Muncul'],
+        as_index=False,
+        observed=True
+    )[['Qty', 'Item Amount']].sum()
+
+    data_grouped['Qty_log'] = np.log1p(data_grouped['Qty'])
+    data_grouped['Item Amount_log'] = np.log1p(data_grouped['Item Amount'])
+    data_grouped['CV_log'] = np.log1p(data_grouped['CV'])
+    return data_grouped
+
+
+# --- STAGE 4: SCALING + KMEANS ---
+def cluster_config_from_env(environ=os.environ):
+    """Konfigurasi backend dari CLUSTER_BACKEND, CLUSTER_BATCH_SIZE, dan CLUSTER_SAMPLE_SIZE."""
+    config = {
+        'backend': environ.get('CLUSTER_BACKEND', CLUSTER_CONFIG['backend']),
+        'batch_size': int(environ.get('CLUSTER_BATCH_SIZE', CLUSTER_CONFIG['batch_size'])),
+        'sample_size': int(environ.get('CLUSTER_SAMPLE_SIZE', CLUSTER_CONFIG['sample_size'])),
+    }
+    if config['backend'] not in CLUSTER_BACKENDS:
+        raise ValueError(f"CLUSTER_BACKEND harus salah satu dari {CLUSTER_BACKENDS}, bukan {config['backend']!r}")
+    return config
+
+
+def fit_kmeans(X_scaled, n_clusters=3, random_state=42, n_init=10, backend='kmeans',
+               batch_size=1024, sample_size=10_000):
+    """Fit model cluster pada X_scaled dengan backend pilihan (lihat CLUSTER_BACKENDS).
+
+    Apa pun backend-nya, model yang dikembalikan punya cluster_centers_, serta
+    labels_ dan inertia_ untuk seluruh baris X_scaled. Seed yang sama dipakai
+    untuk inisialisasi centroid maupun pengambilan sampel.
+    """
+    if backend == 'kmeans' or (backend == 'sample' and len(X_scaled) <= sample_size):
+        return KMeans(n_clusters=n_clusters, random_state=random_state, n_init=n_init).fit(X_scaled)
+    if backend == 'minibatch':
+        return MiniBatchKMeans(
+            n_clusters=n_clusters, random_state=random_state, n_init=n_init, batch_size=batch_size
+        ).fit(X_scaled)
+    if backend == 'sample':
+        rows = np.random.default_rng(random_state).choice(len(X_scaled), size=sample_size, replace=False)
+        model = KMeans(n_clusters=n_clusters, random_state=random_state, n_init=n_init).fit(X_scaled[rows])
+        # Label dan inersia dihitung ulang untuk semua item lewat predict (tervektorisasi)
+        model.labels_ = model.predict(X_scaled)
+        model.inertia_ = -model.score(X_scaled)
+        return model
+    raise ValueError(f"Backend klasterisasi tidak dikenal: {backend!r} (pilihan: {CLUSTER_BACKENDS})")
+
+
+def fit_models(data_grouped, n_clusters=3, random_state=42, n_init=10, features=FEATURES,
+               cluster_config=None):
+    """Fit StandardScaler dan KMeans pada fitur item. Mengembalikan (scaler, kmeans, X_scaled)."""
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(data_grouped[list(features)])
+
+    kmeans = fit_kmeans(X_scaled, n_clusters, random_state, n_init, **(cluster_config or CLUSTER_CONFIG))
+    return scaler, kmeans, X_scaled
+
+
+def fit_clusters(data_grouped, n_clusters=3, random_state=42, n_init=10, features=FEATURES,
+                 reference=None, overrides=None, cluster_config=None):
+    """Standarisasi fitur dan fit KMeans. Mengembalikan data_grouped berlabel dan X_scaled.
+
+    Bila reference diberikan, label KMeans dipetakan ke id cluster stabil
+    (lihat cluster_identity); overrides menerapkan aturan cluster per item.
+    cluster_config memilih backend klasterisasi (default: KMeans exact).
+    """
+    scaler, kmeans, X_scaled = fit_models(
+        data_grouped, n_clusters, random_state, n_init, features, cluster_config
+    )
+    labels = kmeans.labels_ + 1
+    if reference is not None:
+        labels = cluster_identity.match_clusters(kmeans.cluster_centers_, scaler, reference)[kmeans.labels_]
+    data_grouped = data_grouped.copy()
+    data_grouped['Cluster'] = labels
+    data_grouped = cluster_identity.apply_overrides(data_grouped, overrides)
+    return data_grouped, X_scaled
+
+
+# --- CURAH HUJAN ---
+def kategori_curah_hujan(rr):
+    """Kategori curah hujan dari total RR bulanan (batas 100/300/500)."""
+    kategori = pd.cut(rr, bins=RAIN_BINS, labels=RAIN_LABELS).astype(object)
+    return kategori.fillna('Tidak Diketahui')
+
+
+def monthly_rainfall(data_hujan):
+    """Total curah hujan (RR) per periode tahun-bulan beserta kategorinya."""
+    monthly_sum = data_hujan.groupby(data_hujan['TANGGAL'].dt.to_period('M'))['RR'].sum().reset_index()
+    monthly_sum.columns = ['Periode', 'RR_BULAN']
+    monthly_sum['Curah Hujan'] = kategori_curah_hujan(monthly_sum['RR_BULAN'])
+    return monthly_sum
+
+
+# --- STAGE 5: DATA PER PERIODE ---
+def build_cluster_views(data, data_grouped, data_hujan):
+    """Bangun data_grouped_clustered: Qty per item, periode, dan cluster beserta curah hujan."""
+    # Agregasi per periode dulu, baru label cluster ditempel ke hasil agregasi yang
+    # jauh lebih kecil (tanpa data_final selebar data mentah)
+    keys = ['Item', 'Supplier', 'Use']
+    per_periode = data.groupby(keys + ['Periode'], observed=True)[['Qty', 'Item Amount']].sum().reset_index()
+    data_grouped_clustered = per_periode.merge(
+        data_grouped[keys + ['CV', 'Cluster']], on=keys, how='inner'
+    )[keys + ['Periode', 'CV', 'Cluster', 'Qty', 'Item Amount']]
+
+    # Merge curah hujan per periode
+    data_grouped_clustered = data_grouped_clustered.merge(
+        monthly_rainfall(data_hujan), on='Periode', how='left'
+    )
+    data_grouped_clustered['Curah Hujan'] = data_grouped_clustered['Curah Hujan'].fillna('Tidak Diketahui')
+    return data_grouped_clustered
+
+
+# --- KUBUS TOP-N (OPTIMALISASI) ---
+CUBE_KEYS = ['Cluster', 'Curah Hujan', 'Periode']
+TOP_N_MAX = 50
+
+
+def build_top_cube(data_grouped_clustered, top_n=TOP_N_MAX):
+    """Kubus top-N item per (Cluster, Curah Hujan, Periode).
+
+    Baris diurutkan per grup lalu Qty menurun, dengan kolom Rank dan Qty Kumulatif.
+    Mengembalikan (cube, groups); groups menyimpan posisi awal dan ukuran tiap grup
+    sehingga top-N berapa pun (<= top_n) cukup diambil dengan slicing.
+    """
+    cube = data_grouped_clustered[CUBE_KEYS + ['Item', 'Supplier', 'Use', 'Qty']].sort_values(
+        CUBE_KEYS + ['Qty'], ascending=[True, True, True, False]
+    )
+    cube['Rank'] = (cube.groupby(CUBE_KEYS, sort=False).cumcount() + 1).astype('int16')
+    cube = cube[cube['Rank'] <= top_n].reset_index(drop=True)
+    cube['Qty Kumulatif'] = cube.groupby(CUBE_KEYS, sort=False)['Qty'].cumsum()
+
+    groups = cube.groupby(CUBE_KEYS, sort=False).size().rename('size').reset_index()
+    groups['start'] = groups['size'].cumsum() - groups['size']
+    return cube, groups
+
+
+def slice_top_cube(cube, groups, clusters, periods, top_n=10):
+    """Ambil top-N baris dan total Qty top-N untuk cluster dan periode terpilih."""
+    selected = groups[groups['Cluster'].isin(clusters) & groups['Periode'].isin(periods)]
+    starts = selected['start'].to_numpy()
+    take = np.minimum(selected['size'].to_numpy(), top_n)
+    offsets = np.arange(take.sum()) - np.repeat(np.cumsum(take) - take, take)
+    top = cube.iloc[np.repeat(starts, take) + offsets]
+    totals = selected[CUBE_KEYS].assign(Qty=cube['Qty Kumulatif'].to_numpy()[starts + take - 1])
+    return top, totals
+
+
+# --- INDEKS ITEM - FUNGSI OBAT (USE) ---
+def build_use_index(data_grouped):
+    """Indeks many-to-many baris data_grouped -> fungsi obat, tanpa explode.
+
+    String 'Use' dipecah sekali per nilai unik, lalu setiap fungsi obat diberi id
+    integer. Mengembalikan (nama_use, matriks sparse baris x use bernilai 0/1).
+    """
+    codes, categories = pd.factorize(data_grouped['Use'])
+    pairs = pd.Series(np.asarray(categories, dtype=str)).str.split(',').explode().str.strip()
+    pairs = pairs[pairs != '']
+    use_ids, use_names = pd.factorize(pairs.to_numpy(), sort=True)
+
+    use_per_category = sparse.csr_matrix(
+        (np.ones(len(use_ids)), (pairs.index.to_numpy(), use_ids)),
+        shape=(len(categories), len(use_names))
+    )
+    use_per_category.data[:] = 1
+    rows = sparse.csr_matrix(
+        (np.ones(len(codes)), (np.arange(len(codes)), codes)),
+        shape=(len(codes), len(categories))
+    )
+    return np.asarray(use_names), (rows @ use_per_category).tocsr()
+
+
+def use_totals(use_index, groups, values):
+    """Total values per (group, Use) lewat satu perkalian sparse. Mengembalikan DataFrame group x Use."""
+    use_names, matrix = use_index
+    group_codes, group_names = pd.factorize(np.asarray(groups), sort=True)
+    weights = sparse.csr_matrix(
+        (np.asarray(values, dtype=float), (group_codes, np.arange(len(group_codes)))),
+        shape=(len(group_names), matrix.shape[0])
+    )
+    return pd.DataFrame((weights @ matrix).toarray(), index=group_names, columns=use_names)
+
+
+# --- MODEL SELECTION (ELBOW) ---
+def _cluster_quality(X_scaled, labels, random_state, silhouette_sample):
+    """Silhouette (pada sampel bila item > silhouette_sample) dan Davies-Bouldin."""
+    if len(np.unique(labels)) < 2:
+        return {'Silhouette': np.nan, 'Davies-Bouldin': np.nan}
+    sample_size = silhouette_sample if len(X_scaled) > silhouette_sample else None
+    return {
+        'Silhouette': silhouette_score(X_scaled, labels, sample_size=sample_size, random_state=random_state),
+        'Davies-Bouldin': davies_bouldin_score(X_scaled, labels),
+    }
+
+
+def _evaluate_k(X_scaled, k, random_state, n_init, silhouette_sample, cluster_config=None):
+    model = fit_kmeans(X_scaled, k, random_state, n_init, **(cluster_config or CLUSTER_CONFIG))
+    return {'k': k, 'SSE': model.inertia_,
+            **_cluster_quality(X_scaled, model.labels_, random_state, silhouette_sample)}
+
+
+def model_selection_sweep(X_scaled, k_range=range(1, 9), random_state=42, n_init=10,
+                          n_jobs=-1, silhouette_sample=5000, cluster_config=None):
+    """Fit KMeans untuk setiap k secara paralel dan catat SSE, Silhouette, Davies-Bouldin.
+
+    Silhouette dihitung pada sampel acak bila jumlah item melebihi silhouette_sample.
+    """
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_evaluate_k)(X_scaled, k, random_state, n_init, silhouette_sample, cluster_config)
+        for k in k_range
+    )
+    return pd.DataFrame(results)
+
+
+def compare_backends(X_scaled, n_clusters=3, random_state=42, n_init=10, cluster_config=None,
+                     backends=CLUSTER_BACKENDS, silhouette_sample=5000):
+    """Bandingkan setiap backend dengan fit KMeans exact pada X_scaled yang sama.
+
+    Mengembalikan waktu fit, SSE, selisih SSE relatif terhadap exact, kecocokan
+    label (Adjusted Rand Index), Silhouette, dan Davies-Bouldin per backend.
+    """
+    options = {**CLUSTER_CONFIG, **(cluster_config or {})}
+    rows, exact = [], None
+    for backend in ['kmeans'] + [b for b in backends if b != 'kmeans']:
+        start = time.perf_counter()
+        model = fit_kmeans(X_scaled, n_clusters, random_state, n_init, **{**options, 'backend': backend})
+        seconds = time.perf_counter() - start
+        if exact is None:
+            exact = model
+        rows.append({
+            'Backend': backend,
+            'Detik': seconds,
+            'SSE': model.inertia_,
+            'Selisih SSE (%)': (model.inertia_ / exact.inertia_ - 1) * 100,
+            'ARI vs exact': adjusted_rand_score(exact.labels_, model.labels_),
+            **_cluster_quality(X_scaled, model.labels_, random_state, silhouette_sample),
+        })
+    return pd.DataFrame(rows)
+
+
+# --- PIPELINE LENGKAP (BATCH) ---
+RESULTS_MANIFEST = 'manifest.json'
+
+# Kolom bertipe Period[M] yang perlu dikembalikan saat membaca hasil dari CSV/Parquet
+PERIOD_COLUMNS = ['Periode', 'Bulan Puncak', 'Bulan Order']
+
+
+def run_pipeline(data_obat, data_hujan, n_clusters=3, features=FEATURES, random_state=42,
+                 window_months=None, reference=None, overrides=None, k_max=8, lean=False,
+                 cluster_config=None, compare=False, horizon=forecast.HORIZON, lead_time=forecast.LEAD_TIME):
+    """Jalankan seluruh pipeline dari data mentah sampai tabel yang ditampilkan dashboard.
+
+    Bila compare=True, hasil juga memuat 'backend_report' dari compare_backends.
+    """
+    data = compute_stability(clean_data(data_obat, window_months=window_months, lean=lean))
+    data_grouped, X_scaled = fit_clusters(
+        aggregate_items(data),
+        n_clusters=n_clusters,
+        random_state=random_state,
+        features=features,
+        reference=reference,
+        overrides=overrides,
+        cluster_config=cluster_config
+    )
+    views = build_cluster_views(data, data_grouped, data_hujan)
+    rainfall = monthly_rainfall(data_hujan)
+    results = collect_results(
+        data,
+        data_grouped,
+        model_selection_sweep(
+            X_scaled, k_range=range(1, k_max + 1), random_state=random_state, cluster_config=cluster_config
+        ),
+        build_use_index(data_grouped),
+        build_top_cube(views),
+        rainfall,
+        forecast.forecast_orders(views, data_grouped, rainfall, horizon=horizon, lead_time=lead_time)
+    )
+    if compare:
+        results['backend_report'] = compare_backends(
+            X_scaled, n_clusters, random_state, cluster_config=cluster_config
+        )
+    return results
+
+
+def collect_results(data, data_grouped, metrics, use_index, top_cube, rainfall, orders):
+    """Susun tabel hasil akhir (yang dibaca dashboard / diekspor CLI) dari keluaran tiap stage."""
+    use_by_cluster = use_totals(use_index, data_grouped['Cluster'], data_grouped['Qty'])
+    use_by_cluster = use_by_cluster.rename_axis(index='Cluster', columns='Use').stack().rename('Qty').reset_index()
+    use_by_cluster = use_by_cluster[use_by_cluster['Qty'] > 0]
+
+    rainfall = rainfall[rainfall['Periode'].between(data['Periode'].min(), data['Periode'].max())]
+    cube, cube_groups = top_cube
+
+    return {
+        'preview': data.head(),
+        'data_grouped': data_grouped,
+        'cluster_means': cluster_means(data_grouped),
+        'metrics': metrics,
+        'top_items': cube,
+        'top_groups': cube_groups,
+        'use_totals': use_by_cluster,
+        'rainfall': rainfall,
+        'forecast': orders,
+    }
+
+
+def cluster_means(data_grouped):
+    """Rata-rata fitur asli per cluster beserta jumlah item."""
+    means = data_grouped.groupby('Cluster').agg({
+        'Qty': 'mean',
+        'Item Amount': 'mean',
+        'CV': 'mean',
+        'Jumlah Bulan Muncul': 'mean'
+    })
+    means['Jumlah Item'] = data_grouped['Cluster'].value_counts()
+    return means.reset_index()
+
+
+def export_results(results, output_dir, params, fmt='parquet'):
+    """Tulis hasil run_pipeline ke output_dir (Parquet atau CSV) beserta manifest."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    files = {}
+    for name, df in results.items():
+        files[name] = f'{name}.{fmt}'
+        if fmt == 'parquet':
+            df.to_parquet(output_dir / files[name], index=False)
+        else:
+            df.to_csv(output_dir / files[name], index=False)
+
+    manifest = {
+        'params': params,
+        'format': fmt,
+        'files': files,
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    }
+    (output_dir / RESULTS_MANIFEST).write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def read_results_manifest(output_dir):
+    path = Path(output_dir) / RESULTS_MANIFEST
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def load_results(output_dir):
+    """Baca hasil export_results. Kolom PERIOD_COLUMNS dikembalikan ke tipe Period bulanan."""
+    output_dir = Path(output_dir)
+    manifest = read_results_manifest(output_dir)
+    results = {}
+    for name, filename in manifest['files'].items():
+        if manifest['format'] == 'parquet':
+            df = pd.read_parquet(output_dir / filename)
+        else:
+            df = pd.read_csv(output_dir / filename)
+        for col in PERIOD_COLUMNS:
+            if col in df.columns and not isinstance(df[col].dtype, pd.PeriodDtype):
+                df[col] = pd.PeriodIndex(df[col].astype(str), freq='M')
+        results[name] = df
+    return results
+
+
+def main(argv=None):
+    import data_store
+
+    parser = argparse.ArgumentParser(description="Jalankan pipeline klasterisasi obat tanpa Streamlit.")
+    parser.add_argument('--obat', help="File CSV/Parquet data penjualan obat (default: data store lokal).")
+    parser.add_argument('--hujan', help="File CSV/Parquet curah hujan BMKG (default: data store lokal).")
+    parser.add_argument('--k', type=int, default=3, help="Jumlah cluster.")
+    parser.add_argument('--features', default=','.join(FEATURES), help="Daftar fitur, dipisah koma.")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--window-months', type=int, help="Hanya pakai N bulan terakhir.")
+    parser.add_argument('--k-max', type=int, default=8, help="Batas atas k untuk elbow/metrik.")
+    parser.add_argument('--output-dir', default='hasil')
+    parser.add_argument('--format', choices=['parquet', 'csv'], default='parquet')
+    parser.add_argument('--lean', action='store_true', help="Mode hemat memori (categorical + downcast).")
+    parser.add_argument('--horizon', type=int, default=forecast.HORIZON, help="Jumlah bulan yang diprediksi.")
+    parser.add_argument('--lead-time', type=int, default=forecast.LEAD_TIME,
+                        help="Jarak bulan order sebelum bulan puncak prediksi.")
+    config = cluster_config_from_env()
+    parser.add_argument('--backend', choices=CLUSTER_BACKENDS, default=config['backend'],
+                        help="Backend klasterisasi (default: env CLUSTER_BACKEND atau kmeans).")
+    parser.add_argument('--batch-size', type=int, default=config['batch_size'], help="Batch MiniBatchKMeans.")
+    parser.add_argument('--sample-size', type=int, default=config['sample_size'],
+                        help="Jumlah item sampel untuk backend 'sample'.")
+    parser.add_argument('--compare-backends', action='store_true',
+                        help="Tulis backend_report: SSE dan kualitas tiap backend dibanding KMeans exact.")
+    args = parser.parse_args(argv)
+    cluster_config = {'backend': args.backend, 'batch_size': args.batch_size, 'sample_size': args.sample_size}
+
+    def read(path):
+        return pd.read_parquet(path) if str(path).endswith('.parquet') else pd.read_csv(path)
+
+    if args.obat or args.hujan:
+        # Sumber yang tidak diberikan lewat flag diambil dari data store lokal
+        store_obat, store_hujan, _ = (None, None, None) if args.obat and args.hujan else data_store.load_store()
+        data_obat = read(args.obat) if args.obat else store_obat
+        data_hujan = read(args.hujan) if args.hujan else store_hujan
+        data_hujan['TANGGAL'] = pd.to_datetime(data_hujan['TANGGAL'])
+        version = content_hash(data_obat, data_hujan)
+    else:
+        data_obat, data_hujan, version = data_store.load_store()
+
+    reference = cluster_identity.load_reference()
+    overrides = cluster_identity.load_overrides()
+    features = [f.strip() for f in args.features.split(',')]
+    results = run_pipeline(
+        data_obat, data_hujan,
+        n_clusters=args.k,
+        features=features,
+        random_state=args.seed,
+        window_months=args.window_months,
+        reference=reference,
+        overrides=overrides,
+        k_max=args.k_max,
+        lean=args.lean,
+        cluster_config=cluster_config,
+        compare=args.compare_backends,
+        horizon=args.horizon,
+        lead_time=args.lead_time
+    )
+    params = {
+        'data_version': version,
+        'k': args.k,
+        'features': features,
+        'seed': args.seed,
+        'window_months': args.window_months,
+        'k_max': args.k_max,
+        'identity_version': content_hash(reference, overrides),
+        'cluster_config': cluster_config,
+        'horizon': args.horizon,
+        'lead_time': args.lead_time,
+    }
+    export_results(results, args.output_dir, params, fmt=args.format)
+    print(results['cluster_means'].to_string(index=False))
+    if args.compare_backends:
+        print(results['backend_report'].to_string(index=False))
+    print(f"hasil ditulis ke {args.output_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+"""update-reference harus mempertahankan pasangan id -> nama walaupun label KMeans berubah urutan."""
+import numpy as np
+
+import cluster_identity
+import pipeline_obat as pipeline
+from synthetic import generate_invoices
+
+
+def test_refit_reference_keeps_names_on_permuted_labels():
+    data_obat = generate_invoices(20_000, 400, n_months=10, seed=3)
+    data = pipeline.compute_stability(pipeline.clean_data(data_obat))
+    data_grouped, _ = pipeline.fit_clusters(pipeline.aggregate_items(data))
+    centers = data_grouped.groupby('Cluster')[pipeline.FEATURES].mean()
+
+    # Referensi dengan id terbalik dari urutan label KMeans
+    reference = {
+        'features': list(pipeline.FEATURES),
+        'clusters': [
+            {'id': 4 - int(label), 'name': f"Karakteristik {label}", 'centroid': list(row)}
+            for label, row in centers.iterrows()
+        ],
+    }
+    updated = cluster_identity.refit_reference(data_obat, reference)
+
+    assert cluster_identity.cluster_names(updated) == cluster_identity.cluster_names(reference)
+    before = {c['id']: c['centroid'] for c in reference['clusters']}
+    for cluster in updated['clusters']:
+        np.testing.assert_allclose(cluster['centroid'], before[cluster['id']], atol=1e-3)
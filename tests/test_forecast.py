@@ -0,0 +1,50 @@
+"""Fit batch harus sama dengan solusi ridge per item, dan bulan order tidak dipotong ke horizon."""
+import numpy as np
+import pandas as pd
+
+import forecast
+import pipeline_obat as pipeline
+from synthetic import generate_invoices, generate_rainfall
+
+
+def _inputs(n_months=12):
+    data = pipeline.compute_stability(pipeline.clean_data(generate_invoices(30_000, 300, n_months=n_months, seed=4)))
+    data_grouped = pipeline.aggregate_items(data)
+    data_grouped['Cluster'] = np.arange(len(data_grouped)) % 3 + 1
+    data_hujan = generate_rainfall(n_months=n_months, seed=4)
+    views = pipeline.build_cluster_views(data, data_grouped, data_hujan)
+    return views, data_grouped, pipeline.monthly_rainfall(data_hujan)
+
+
+def test_batched_fit_matches_per_item_solve():
+    views, data_grouped, rainfall = _inputs()
+    periods = pd.period_range(views['Periode'].min(), views['Periode'].max(), freq='M')
+    Y = forecast.demand_matrix(views, data_grouped, periods)
+    rain_z, _ = forecast.rainfall_covariate(rainfall, periods, forecast.HORIZON)
+    X = forecast.design_matrix(rain_z, len(periods))[:len(periods)]
+    clusters = data_grouped['Cluster'].to_numpy()
+
+    level, coef, _ = forecast.fit_demand(Y, X, clusters, shrinkage=1.0, chunk_size=64, n_jobs=2)
+
+    T = len(periods)
+    slopes = np.diag([0.0, 1.0, 1.0])
+    Y_rel = Y / level[:, None]
+    for i in range(0, len(Y), 37):
+        members = Y_rel[clusters == clusters[i]].mean(axis=0)
+        prior = np.linalg.solve(X.T @ X + 1e-3 * T * slopes, X.T @ members)
+        expected = np.linalg.solve(X.T @ X + T * slopes, X.T @ Y_rel[i] + T * slopes @ prior)
+        np.testing.assert_allclose(coef[i], expected, rtol=1e-8, atol=1e-10)
+
+
+def test_order_month_can_precede_forecast_window():
+    views, data_grouped, rainfall = _inputs()
+    last = views['Periode'].max()
+    lead_time = forecast.HORIZON + 1
+    orders = forecast.forecast_orders(views, data_grouped, rainfall, lead_time=lead_time, n_jobs=1)
+
+    gap = (orders['Bulan Puncak'] - orders['Bulan Order']).map(lambda offset: offset.n)
+    assert (gap == lead_time).all()
+    assert (orders['Bulan Order'] <= last).all()
+    expected = np.where(orders['Bulan Order'] < last, 'Terlambat', 'Segera')
+    assert (orders['Status Order'] == expected).all()
+    assert len(orders) == len(data_grouped)
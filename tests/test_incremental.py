@@ -0,0 +1,27 @@
+"""State inkremental harus sama dengan hitung ulang penuh dari seluruh riwayat."""
+import numpy as np
+import pandas as pd
+
+import incremental
+import pipeline_obat as pipeline
+from synthetic import generate_invoices
+
+
+def test_update_matches_full_recompute():
+    data = generate_invoices(20_000, 300, n_months=8, seed=1)
+    data[incremental.ITEM_KEYS] = data[incremental.ITEM_KEYS].astype(object)
+    periode = data['Invoice Date'].dt.to_period('M')
+    split = periode.max() - 2
+
+    state = incremental.init_state(data[periode <= split])
+    for month in sorted(periode[periode > split].unique()):
+        incremental.update_state(state, data[periode == month], drift_threshold=np.inf)
+
+    expected = pipeline.aggregate_items(pipeline.compute_stability(pipeline.clean_data(data)))
+    actual = incremental.to_data_grouped(state)
+    merged = expected.merge(actual, on=incremental.ITEM_KEYS, suffixes=('', '_inc'), validate='1:1')
+
+    assert len(merged) == len(expected) == len(actual)
+    for col in ['CV', 'Jumlah Bulan Muncul', 'Qty', 'Item Amount']:
+        np.testing.assert_allclose(merged[f'{col}_inc'], merged[col], rtol=1e-9)
+    assert pd.api.types.is_integer_dtype(actual['Cluster'])
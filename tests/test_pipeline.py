@@ -0,0 +1,61 @@
+"""Stage preprocessing hemat memori harus memberi hasil yang sama dengan versi berbasis merge."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import pipeline_obat as pipeline
+from synthetic import generate_invoices, generate_rainfall
+
+
+def _reference_views(data_obat, data_hujan, window_months):
+    """Implementasi awal: filter berantai, merge stabilitas, dan merge data_final per baris."""
+    data = data_obat[~data_obat['Item'].str.contains('Racikan', case=False, na=False)]
+    data = data[data['Qty'] > 0].copy()
+    data['Periode'] = pd.to_datetime(data['Invoice Date']).dt.to_period('M')
+    if window_months:
+        data = data[data['Periode'] > data['Periode'].max() - window_months]
+
+    qty_bulanan = data.groupby(['Item', 'Periode'], observed=True)['Qty'].sum().reset_index()
+    stabilitas = qty_bulanan.groupby('Item', observed=True)['Qty'].agg(['mean', 'std']).reset_index()
+    stabilitas['CV'] = stabilitas['std'] / stabilitas['mean'] * 100
+    bulan_aktif = qty_bulanan.groupby('Item', observed=True)['Periode'].nunique().rename('Jumlah Bulan Muncul')
+    stabilitas = stabilitas[['Item', 'CV']].merge(bulan_aktif.reset_index(), on='Item', how='left')
+    data = data.merge(stabilitas, on='Item', how='left')
+    data['CV'] = data['CV'].fillna(80)
+
+    data_grouped = pipeline.aggregate_items(data)
+    data_grouped['Cluster'] = np.arange(len(data_grouped)) % 3 + 1
+    data_final = data.merge(data_grouped[['Item', 'Cluster']].drop_duplicates(), on='Item', how='left')
+    views = data_final.groupby(
+        ['Item', 'Supplier', 'Use', 'Periode', 'CV', 'Cluster'], as_index=False, observed=True
+    )[['Qty', 'Item Amount']].sum()
+    return data_grouped, views
+
+
+@pytest.mark.parametrize('fractional', [False, True])
+@pytest.mark.parametrize('categorical', [True, False])
+@pytest.mark.parametrize('window_months', [None, 4])
+@pytest.mark.parametrize('lean', [False, True])
+def test_lean_preprocessing_matches_reference(categorical, window_months, lean, fractional):
+    data_obat = generate_invoices(20_000, 400, n_months=10, seed=2)
+    if fractional:
+        # Harga sintetis dibulatkan ke ratusan; Item Amount pecahan menguji dtype float
+        data_obat['Item Amount'] = data_obat['Item Amount'] + 0.5
+    if not categorical:
+        data_obat = data_obat.astype({'Item': object, 'Supplier': object, 'Use': object})
+    data_hujan = generate_rainfall(n_months=10, seed=2)
+    expected_grouped, expected_views = _reference_views(data_obat, data_hujan, window_months)
+
+    data = pipeline.compute_stability(pipeline.clean_data(data_obat, window_months=window_months, lean=lean))
+    data_grouped = pipeline.aggregate_items(data)
+    data_grouped['Cluster'] = np.arange(len(data_grouped)) % 3 + 1
+    views = pipeline.build_cluster_views(data, data_grouped, data_hujan)
+
+    assert pd.api.types.is_integer_dtype(data['Jumlah Bulan Muncul'])
+    for expected, actual in [(expected_grouped, data_grouped), (expected_views, views[expected_views.columns])]:
+        assert list(actual.columns) == list(expected.columns)
+        pd.testing.assert_frame_equal(
+            actual.astype({c: str for c in ['Item', 'Supplier', 'Use']}).astype({'Qty': 'int64'}).reset_index(drop=True),
+            expected.astype({c: str for c in ['Item', 'Supplier', 'Use']}).astype({'Qty': 'int64'}).reset_index(drop=True),
+            check_dtype=False, check_exact=True
+        )